@@ -0,0 +1,196 @@
+import asyncio
+import os
+import random
+import time
+
+import httpx
+
+from llm_cache import cache_key, get_cache
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_TIMEOUT = 120.0
+# Back-off base and cap in seconds; each retry waits a random time up to base * 2**attempt
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+DEFAULT_BASE_URLS = {
+    'openai': "https://openrouter.ai/api/v1",
+    'ollama': "http://localhost:11434",
+    'gemini': "https://generativelanguage.googleapis.com/v1beta"
+}
+API_KEY_VARIABLES = {
+    'openai': "OPENROUTER_API_KEY",
+    'gemini': "GOOGLE_API_KEY"
+}
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average with bursts of up to
+    `capacity` requests.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def build_request(provider, model, messages, options, api_key):
+    """
+    Return (path, headers, json body) of one chat request for the provider.
+    """
+    if provider == 'openai':
+        headers = {'Authorization': f"Bearer {api_key}"} if api_key else {}
+        return '/chat/completions', headers, {'model': model, 'messages': messages, **options}
+    if provider == 'ollama':
+        body = {'model': model, 'messages': messages, 'stream': False}
+        if options:
+            body['options'] = options
+        return '/api/chat', {}, body
+    if provider == 'gemini':
+        system = [m['content'] for m in messages if m['role'] == 'system']
+        body = {
+            'contents': [
+                {'role': 'model' if m['role'] == 'assistant' else 'user',
+                 'parts': [{'text': m['content']}]}
+                for m in messages if m['role'] != 'system'
+            ]
+        }
+        if system:
+            body['systemInstruction'] = {'parts': [{'text': text} for text in system]}
+        if options:
+            body['generationConfig'] = options
+        return f'/models/{model}:generateContent', {'x-goog-api-key': api_key or ''}, body
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+def parse_response(provider, data):
+    """
+    Extract the answer text from a provider's JSON response.
+    """
+    if provider == 'openai':
+        return data['choices'][0]['message']['content']
+    if provider == 'ollama':
+        return data['message']['content']
+    return ''.join(part.get('text', '') for part in data['candidates'][0]['content']['parts'])
+
+
+def retry_delay(attempt, response=None):
+    """
+    Full-jitter exponential back-off; a Retry-After header (in seconds) wins.
+    """
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), RETRY_MAX_DELAY)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class AsyncLLMClient:
+    """
+    Asyncio client for OpenAI-compatible (OpenRouter, Ollama /v1), Ollama
+    and Gemini chat endpoints. At most `max_concurrency` requests are in
+    flight and `requests_per_second` (if given) caps the request rate, so
+    throughput follows the provider's limit rather than the round-trip time.
+    Use it as `async with AsyncLLMClient(...) as client:`.
+    """
+
+    def __init__(self, provider, model, base_url=None, api_key=None,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, requests_per_second=None,
+                 max_retries=DEFAULT_MAX_RETRIES, timeout=DEFAULT_TIMEOUT, use_cache=True):
+        self.provider = provider
+        self.model = model
+        self.base_url = (base_url or DEFAULT_BASE_URLS[provider]).rstrip('/')
+        self.api_key = api_key if api_key is not None else os.getenv(API_KEY_VARIABLES.get(provider, ''))
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.bucket = TokenBucket(requests_per_second) if requests_per_second else None
+        self.cache = get_cache() if use_cache else None
+        self.client = None
+        self.max_concurrency = max_concurrency
+
+    async def __aenter__(self):
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        self.client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+
+    async def _send(self, messages, options):
+        path, headers, body = build_request(self.provider, self.model, messages, options,
+                                            self.api_key)
+        for attempt in range(self.max_retries + 1):
+            if self.bucket is not None:
+                await self.bucket.acquire()
+            response = None
+            try:
+                response = await self.client.post(path, json=body, headers=headers)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return parse_response(self.provider, response.json())
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            if attempt == self.max_retries:
+                response.raise_for_status()
+            await asyncio.sleep(retry_delay(attempt, response))
+
+    async def complete(self, prompt, system=None, **options):
+        """
+        Answer one prompt. Answers already in llm_cache are returned without
+        a request.
+        """
+        messages = ([{'role': 'system', 'content': system}] if system else []) + \
+            [{'role': 'user', 'content': prompt}]
+        key = None
+        if self.cache is not None:
+            params = {'system': system, **options} if system else options
+            key = cache_key(self.provider, self.model, prompt, params)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        async with self.semaphore:
+            answer = await self._send(messages, options)
+        if key is not None:
+            self.cache.set(key, self.provider, self.model, answer)
+        return answer
+
+    async def complete_many(self, prompts, system=None, return_exceptions=False, **options):
+        """
+        Answer all prompts concurrently; results are in the order of `prompts`.
+        With return_exceptions=True a failed prompt gives its exception
+        instead of cancelling the whole batch.
+        """
+        return await asyncio.gather(
+            *(self.complete(prompt, system, **options) for prompt in prompts),
+            return_exceptions=return_exceptions)
+
+
+def complete_batch(provider, model, prompts, system=None, return_exceptions=False, **client_options):
+    """
+    Blocking helper for scripts: answer many prompts with one client.
+    """
+    async def run():
+        async with AsyncLLMClient(provider, model, **client_options) as client:
+            return await client.complete_many(prompts, system, return_exceptions)
+    return asyncio.run(run())
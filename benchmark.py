@@ -0,0 +1,309 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SIZES = '10k,1M,10M'
+DEFAULT_DATA_DIR = '.bench_data'
+DEFAULT_REPEAT = 3
+DATA_SEED = 42
+# Faker generation is ~10k rows/s, so it is only measured on small datasets
+FAKER_MAX_ROWS = 100000
+SUFFIXES = {'k': 1000, 'm': 1000 ** 2}
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text[-1] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def dataset_paths(data_dir, rows):
+    base = os.path.join(data_dir, f'users_{rows}')
+    return base + '.csv', base + '.db'
+
+
+def ensure_dataset(data_dir, rows):
+    """
+    Generate the users-schema CSV (and a SQLite copy for the export
+    benchmark) once per size; the seed is fixed, so every run and every
+    commit measures the same data.
+    """
+    from sqlite_bulk_load import bulk_load, iter_csv_rows
+    from synthetic_users import generate_users
+
+    os.makedirs(data_dir, exist_ok=True)
+    csv_path, db_path = dataset_paths(data_dir, rows)
+    if not os.path.exists(csv_path):
+        print(f"Generating {rows} rows into {csv_path}")
+        generate_users(csv_path, rows, workers=os.cpu_count() or 1, seed=DATA_SEED, schema='users')
+    if not os.path.exists(db_path):
+        rows_iter = iter_csv_rows(csv_path)
+        columns = next(rows_iter)
+        bulk_load(db_path + '.tmp', rows_iter, columns)
+        os.replace(db_path + '.tmp', db_path)
+    return csv_path, db_path
+
+
+# Each benchmark is (setup, run): setup(csv_path, db_path, work_dir) returns
+# the state passed to run(state); only run() is timed and profiled.
+
+def _remove_cache(csv_path):
+    from data_loading import cache_paths
+    for path in cache_paths(csv_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def setup_load_cold(csv_path, db_path, work_dir):
+    _remove_cache(csv_path)
+    return csv_path
+
+
+def run_load(csv_path):
+    from data_analysis import load_data
+    return load_data(csv_path)
+
+
+def setup_load_cached(csv_path, db_path, work_dir):
+    from data_loading import load_users_table
+    load_users_table(csv_path)
+    return csv_path
+
+
+def setup_frame(csv_path, db_path, work_dir):
+    from data_analysis import load_data
+    return load_data(csv_path)
+
+
+def run_numerical(df):
+    from data_analysis import numerical_analysis
+    return [numerical_analysis(df, col) for col in df.select_dtypes(include=['number']).columns]
+
+
+def run_categorical(df):
+    from data_analysis import categorical_analysis
+    return [categorical_analysis(df, col) for col in df.select_dtypes(exclude=['number']).columns]
+
+
+def setup_report(csv_path, db_path, work_dir):
+    from data_analysis import categorical_analysis, load_data, numerical_analysis
+    df = load_data(csv_path)
+    num_stats = {col: numerical_analysis(df, col) for col in df.select_dtypes(include=['number']).columns}
+    cat_stats = {col: categorical_analysis(df, col) for col in df.select_dtypes(exclude=['number']).columns}
+    return df, num_stats, cat_stats, os.path.join(work_dir, 'report.md')
+
+
+def run_report(state):
+    from data_analysis import generate_markdown_report
+    df, num_stats, cat_stats, output_file = state
+    generate_markdown_report(df, num_stats, cat_stats, output_file)
+
+
+def setup_export(csv_path, db_path, work_dir):
+    return db_path, os.path.join(work_dir, 'export.csv')
+
+
+def run_export(state):
+    from fetch_user_data import export_users_csv
+    db_path, output_file = state
+    export_users_csv(db_path, output_file)
+
+
+def setup_generate(csv_path, db_path, work_dir):
+    rows = sum(1 for _ in open(csv_path, 'rb')) - 1
+    return rows, os.path.join(work_dir, 'generated.csv')
+
+
+def run_generate_fast(state):
+    from synthetic_users import generate_users
+    rows, output_file = state
+    # Same columns as the Faker baseline (first.py), so the two are comparable
+    generate_users(output_file, rows, workers=os.cpu_count() or 1, seed=DATA_SEED, schema='first')
+
+
+def run_generate_faker(state):
+    from first import generate_with_faker
+    rows, output_file = state
+    generate_with_faker(rows, output_file)
+
+
+BENCHMARKS = {
+    'load_data': (setup_load_cold, run_load),
+    'load_data_cached': (setup_load_cached, run_load),
+    'numerical_analysis': (setup_frame, run_numerical),
+    'categorical_analysis': (setup_frame, run_categorical),
+    'generate_markdown_report': (setup_report, run_report),
+    'fetch_export': (setup_export, run_export),
+    'generate_fast': (setup_generate, run_generate_fast),
+    'generate_faker': (setup_generate, run_generate_faker)
+}
+# Benchmarks whose setup has to be repeated before every timed run
+RESET_EACH_RUN = {'load_data'}
+
+
+def reset_peak_rss():
+    """
+    Reset the kernel's peak RSS counter (Linux); returns False elsewhere.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux and bytes on macOS, and covers the whole process
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+
+def measure(name, csv_path, db_path, work_dir, repeat, queue):
+    """
+    Child process: time `repeat` runs, then one more run under tracemalloc
+    for the Python/numpy allocation peak. Peak RSS is taken around the
+    first timed run.
+    """
+    setup, run = BENCHMARKS[name]
+    state = setup(csv_path, db_path, work_dir)
+    times = []
+    rss = None
+    for i in range(repeat):
+        if i and name in RESET_EACH_RUN:
+            state = setup(csv_path, db_path, work_dir)
+        rss_reset = i == 0 and reset_peak_rss()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+        if i == 0:
+            rss = peak_rss_mb() if rss_reset else None
+    if name in RESET_EACH_RUN:
+        state = setup(csv_path, db_path, work_dir)
+    tracemalloc.start()
+    run(state)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put({
+        'times': times,
+        'min': min(times),
+        'median': statistics.median(times),
+        'tracemalloc_peak_mb': traced_peak / (1024 * 1024),
+        'peak_rss_mb': rss
+    })
+
+
+def run_benchmark(name, rows, csv_path, db_path, work_dir, repeat):
+    """
+    Run one benchmark in a fresh process, so memory peaks and caches of
+    earlier benchmarks do not leak into it.
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=measure,
+                                      args=(name, csv_path, db_path, work_dir, repeat, queue))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        return {'benchmark': name, 'rows': rows, 'error': f"exit code {process.exitcode}"}
+    return {'benchmark': name, 'rows': rows, **queue.get()}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'commit': commit or None,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def print_results(results, baseline=None):
+    previous = {}
+    if baseline is not None:
+        previous = {(r['benchmark'], r['rows']): r for r in baseline['results'] if 'min' in r}
+    print(f"{'benchmark':<26}{'rows':>10}{'min s':>10}{'median s':>10}{'traced MB':>11}"
+          f"{'RSS MB':>9}{'vs base':>9}")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['benchmark']:<26}{result['rows']:>10}  {result['error']}")
+            continue
+        rss = f"{result['peak_rss_mb']:.0f}" if result['peak_rss_mb'] is not None else '-'
+        base = previous.get((result['benchmark'], result['rows']))
+        ratio = f"{result['min'] / base['min']:.2f}x" if base else '-'
+        print(f"{result['benchmark']:<26}{result['rows']:>10}{result['min']:>10.3f}"
+              f"{result['median']:>10.3f}{result['tracemalloc_peak_mb']:>11.1f}{rss:>9}{ratio:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis hot paths.")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="comma separated row counts (10k,1M,...)")
+    parser.add_argument('--benchmarks', default=','.join(BENCHMARKS),
+                        help="comma separated subset of: " + ', '.join(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help="generated datasets are kept here between runs")
+    parser.add_argument('--output', default=None, help="JSON results file")
+    parser.add_argument('--compare', default=None, help="earlier JSON results to compare with")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.benchmarks.split(',') if name.strip()]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Error: unknown benchmarks: {', '.join(unknown)}")
+        return
+
+    results = []
+    for rows in (parse_size(size) for size in args.sizes.split(',')):
+        csv_path, db_path = ensure_dataset(args.data_dir, rows)
+        work_dir = os.path.join(args.data_dir, f'work_{rows}')
+        os.makedirs(work_dir, exist_ok=True)
+        for name in names:
+            if name == 'generate_faker' and rows > FAKER_MAX_ROWS:
+                continue
+            print(f"Running {name} on {rows} rows")
+            results.append(run_benchmark(name, rows, csv_path, db_path, work_dir, args.repeat))
+
+    report = {'environment': environment(), 'results': results}
+    commit = report['environment']['commit']
+    output = args.output or os.path.join(args.data_dir, f"results_{commit[:12] if commit else 'local'}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+FIGSIZE = (10, 6)
+DPI = 100
+# Line charts keep this many points after LTTB downsampling
+LINE_POINTS = 2000
+# Up to this many points a scatter plot is drawn as is, above it as a 2D density
+SCATTER_MAX_POINTS = 10000
+DENSITY_BINS = (200, 100)
+# Workers are never forked from the caller: it may be running other threads
+# (e.g. pipeline stages), and forking a multi-threaded process can deadlock
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Chart specs are plain dicts with already aggregated data, so they are
+# cheap to send to worker processes; `kind` picks the drawing function.
+
+
+def histogram_spec(values, path, title, xlabel, ylabel, bins=10):
+    counts, edges = np.histogram(np.asarray(values, dtype='float64'), bins=bins)
+    return {'kind': 'histogram', 'path': path, 'title': title, 'xlabel': xlabel,
+            'ylabel': ylabel, 'counts': counts, 'edges': edges}
+
+
+def bar_spec(series, path, title, xlabel, ylabel, top_k=5):
+    counts = series.value_counts().head(top_k)
+    return {'kind': 'bar', 'path': path, 'title': title, 'xlabel': xlabel, 'ylabel': ylabel,
+            'labels': [str(label) for label in counts.index], 'counts': counts.to_numpy()}
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling: return the indexes of
+    `threshold` points that keep the visual shape of the (sorted) series.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype('int64')
+    selected = np.empty(threshold, dtype='int64')
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_start = stop if i + 2 < len(edges) else n - 1
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        px, py = x[previous], y[previous]
+        area = np.abs((px - avg_x) * (y[start:stop] - py) - (px - x[start:stop]) * (avg_y - py))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def line_spec(x, y, path, title, xlabel, ylabel, points=LINE_POINTS):
+    """
+    x may be datetimes; the series is sorted by x and downsampled with LTTB.
+    """
+    x, y, is_date = _finite_points(x, y)
+    order = np.argsort(x, kind='stable')
+    x, y = x[order], y[order]
+    keep = lttb(x, y, points)
+    return {'kind': 'line', 'path': path, 'title': title, 'xlabel': xlabel, 'ylabel': ylabel,
+            'x': x[keep], 'y': y[keep], 'is_date': is_date}
+
+
+def scatter_spec(x, y, path, title, xlabel, ylabel, max_points=SCATTER_MAX_POINTS,
+                 bins=DENSITY_BINS):
+    """
+    Small data is drawn point by point; large data is aggregated into a
+    2D histogram, so the drawing cost does not depend on the row count.
+    """
+    x, y, is_date = _finite_points(x, y)
+    spec = {'path': path, 'title': title, 'xlabel': xlabel, 'ylabel': ylabel, 'is_date': is_date}
+    if len(x) <= max_points:
+        spec.update(kind='scatter', x=x, y=y)
+    else:
+        counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+        spec.update(kind='density', counts=counts, x_edges=x_edges, y_edges=y_edges)
+    return spec
+
+
+def _as_numbers(values):
+    """
+    Datetimes become matplotlib date numbers (float days), which the
+    workers can plot with a date axis.
+    """
+    if not isinstance(values, pd.Series):
+        values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return mdates.date2num(values.to_numpy()), True
+    return values.to_numpy(dtype='float64'), False
+
+
+def _finite_points(x, y):
+    x, is_date = _as_numbers(x)
+    y = np.asarray(y, dtype='float64')
+    valid = np.isfinite(x) & np.isfinite(y)
+    return x[valid], y[valid], is_date
+
+
+def render_chart(spec):
+    """
+    Draw one spec with the object-oriented API on an Agg canvas (no pyplot
+    state) and save it. Returns the file path.
+    """
+    fig = Figure(figsize=FIGSIZE, dpi=DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    kind = spec['kind']
+    if kind == 'histogram':
+        edges = spec['edges']
+        ax.bar(edges[:-1], spec['counts'], width=np.diff(edges), align='edge', edgecolor='black')
+    elif kind == 'bar':
+        ax.bar(spec['labels'], spec['counts'])
+        ax.tick_params(axis='x', labelrotation=45)
+    elif kind == 'line':
+        ax.plot(spec['x'], spec['y'], marker='o', markersize=2)
+    elif kind == 'scatter':
+        ax.scatter(spec['x'], spec['y'], s=8)
+    elif kind == 'density':
+        mesh = ax.pcolormesh(spec['x_edges'], spec['y_edges'], spec['counts'].T, cmap='viridis')
+        fig.colorbar(mesh, ax=ax, label='Počet')
+    if spec.get('is_date'):
+        ax.xaxis_date()
+        ax.tick_params(axis='x', labelrotation=45)
+    ax.set_title(spec['title'])
+    ax.set_xlabel(spec['xlabel'])
+    ax.set_ylabel(spec['ylabel'])
+    fig.tight_layout()
+    fig.savefig(spec['path'])
+    return spec['path']
+
+
+def render_charts(specs, workers=None):
+    """
+    Render the specs in a process pool (one chart per process at a time).
+    The pool uses START_METHOD, so the calling script needs a __main__ guard.
+    """
+    specs = list(specs)
+    if workers is None:
+        workers = min(len(specs), os.cpu_count() or 1)
+    if workers <= 1 or len(specs) <= 1:
+        return [render_chart(spec) for spec in specs]
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context(START_METHOD)) as executor:
+        return list(executor.map(render_chart, specs))
+
+
+def user_chart_specs(df, output_dir, names, timeline='line'):
+    """
+    The three standard charts of the users reports: salary histogram, top 5
+    occupations and salary over created_at (`timeline` 'line' or 'scatter').
+    names: (histogram file, occupations file, timeline file).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    histogram_file, occupations_file, timeline_file = (os.path.join(output_dir, name) for name in names)
+    created_at = pd.to_datetime(df['created_at'])
+    timeline_spec = line_spec if timeline == 'line' else scatter_spec
+    return [
+        histogram_spec(df['salary'].dropna(), histogram_file, 'Distribúcia platov', 'Plat',
+                       'Počet používateľov'),
+        bar_spec(df['occupation'], occupations_file, 'Top 5 povolaní', 'Povolanie', 'Počet'),
+        timeline_spec(created_at, df['salary'], timeline_file, 'Platy podľa dátumu vytvorenia',
+                      'Dátum vytvorenia', 'Plat')
+    ]
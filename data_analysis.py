@@ -1,21 +1,32 @@
+import argparse
+import sqlite3
+from collections import Counter
+from contextlib import closing
+from functools import partial
+
+import numpy as np
 import pandas as pd
 import os
 
-def load_data(file_path):
+from data_loading import iter_clean_chunks, read_users_csv
+from incremental_report import incremental_analysis
+from parallel_analysis import analyze_columns
+from profiling import profiler
+from sql_analysis import analyze_table_sql
+from report_rendering import WRITERS, bullets, format_value, heading, table, write_report
+from streaming_stats import (DEFAULT_CHUNKSIZE, DEFAULT_HEAVY_HITTER_ERROR, ColumnAccumulator,
+                             HyperLogLog, SpaceSaving, heavy_hitters)
+
+def load_data(file_path, chunksize=None, memory_limit_mb=None):
     """
     Load CSV data and handle missing values.
     For numerical columns, fill missing values with median.
     For categorical columns, drop rows with missing values.
+    With chunksize or memory_limit_mb the file is parsed in bounded chunks;
+    the returned frame still holds the whole table.
     """
     try:
-        df = pd.read_csv(file_path)
-        # Handle missing values
-        for col in df.columns:
-            if df[col].dtype in ['int64', 'float64']:
-                df[col].fillna(df[col].median(), inplace=True)
-            else:
-                df.dropna(subset=[col], inplace=True)
-        return df
+        return read_users_csv(file_path, chunksize=chunksize, memory_limit_mb=memory_limit_mb)
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         return None
@@ -58,79 +69,248 @@ def numerical_analysis(df, col):
         '75th Percentile': p75
     }
 
-def categorical_analysis(df, col):
+def categorical_analysis(df, col, top_k=5, approximate=False, error=DEFAULT_HEAVY_HITTER_ERROR):
     """
     Perform frequency analysis on a categorical column.
-    Returns a DataFrame with top 5 values, counts, and percentages.
+    Returns a DataFrame with the top_k values, counts, and percentages.
+    With approximate=True the counts come from a bounded Space-Saving summary
+    and the estimated distinct count is stored in the DataFrame's attrs.
     """
-    counts = df[col].value_counts()
-    top5 = counts.head(5)
     total = len(df)
+    if approximate:
+        top5, distinct, max_error = heavy_hitters(df[col], k=top_k, error=error)
+    else:
+        top5 = df[col].value_counts().head(top_k)
     percentages = (top5 / total * 100).round(2)
-    return pd.DataFrame({'Count': top5, 'Percentage': percentages})
+    result = pd.DataFrame({'Count': top5, 'Percentage': percentages})
+    if approximate:
+        result.attrs['Distinct Values (estimated)'] = distinct
+        result.attrs['Max Count Error'] = max_error
+    return result
+
+def streaming_analysis(file_path, chunksize=DEFAULT_CHUNKSIZE, exact=False, top_k=5,
+                       error=DEFAULT_HEAVY_HITTER_ERROR):
+    """
+    Compute all report statistics in one pass over cleaned CSV chunks (same
+    median-fill and drop rules as load_data) without loading the table.
+    Unless exact=True, quantiles come from sketches and categorical counts
+    from bounded Space-Saving summaries, so memory stays flat.
+    Returns (num_stats, cat_stats, total_records, total_columns).
+    """
+    numerical = categorical = distinct = None
+    total = 0
+    for chunk in iter_clean_chunks(file_path, chunksize=chunksize, exact_median=exact):
+        if numerical is None:
+            num_cols = chunk.select_dtypes(include=['number']).columns
+            cat_cols = chunk.select_dtypes(exclude=['number']).columns
+            numerical = {col: ColumnAccumulator(exact=exact) for col in num_cols}
+            categorical = {col: Counter() if exact else SpaceSaving(error) for col in cat_cols}
+            distinct = {} if exact else {col: HyperLogLog() for col in cat_cols}
+        total += len(chunk)
+        for col, acc in numerical.items():
+            acc.update(chunk[col])
+        for col, counts in categorical.items():
+            if exact:
+                values = chunk[col].value_counts()
+                counts.update(values[values > 0].to_dict())
+            else:
+                counts.update(chunk[col])
+                distinct[col].update(chunk[col])
+    if numerical is None:
+        return {}, {}, 0, 0
+    
+    num_stats = {col: acc.to_dict() for col, acc in numerical.items()}
+    cat_stats = {}
+    for col, counts in categorical.items():
+        if exact:
+            top = pd.Series(dict(counts.most_common(top_k)), dtype='int64')
+        else:
+            top = counts.top(top_k)
+        percentages = (top / total * 100).round(2)
+        cat_stats[col] = pd.DataFrame({'Count': top, 'Percentage': percentages})
+        if not exact:
+            cat_stats[col].attrs['Distinct Values (estimated)'] = distinct[col].estimate()
+            cat_stats[col].attrs['Max Count Error'] = counts.max_error
+    return num_stats, cat_stats, total, len(numerical) + len(categorical)
 
-def generate_markdown_report(df, num_stats, cat_stats, output_file):
+def report_sections(num_stats, cat_stats, total_records, total_columns):
+    """
+    Yield the report sections (see report_rendering) one at a time.
+    """
+    yield heading("User Data Analysis Report", level=1)
+    
+    # Data Overview
+    yield heading("Data Overview")
+    yield bullets([("Total Records", total_records), ("Total Columns", total_columns)])
+    
+    # Numerical Columns Statistics
+    yield heading("Numerical Columns Statistics")
+    for col, stats in num_stats.items():
+        yield heading(col, level=3)
+        yield table(["Statistic", "Value"],
+                    [list(stats.keys()), np.array(list(stats.values()), dtype=object)],
+                    formats=[None, format_value])
+    
+    # Categorical Columns Analysis
+    yield heading("Categorical Columns Analysis")
+    for col, df_stats in cat_stats.items():
+        yield heading(col, level=3)
+        yield table(["Value", "Count", "Percentage"],
+                    [df_stats.index.to_numpy(dtype=object), df_stats['Count'].to_numpy(),
+                     df_stats['Percentage'].to_numpy(dtype='float64')],
+                    formats=[None, None, '%.2f%%'])
+        if df_stats.attrs:
+            yield bullets(df_stats.attrs.items())
+
+def generate_markdown_report(df, num_stats, cat_stats, output_file,
+                             total_records=None, total_columns=None, formats=('md',)):
     """
     Generate the Markdown report with analysis findings.
+    Without a DataFrame (incremental mode) pass total_records/total_columns.
+    Extra formats ('html', 'json') are written next to the Markdown file.
     """
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("# User Data Analysis Report\n\n")
-        
-        # Data Overview
-        f.write("## Data Overview\n\n")
-        f.write(f"- **Total Records:** {len(df)}\n")
-        f.write(f"- **Total Columns:** {len(df.columns)}\n\n")
-        
-        # Numerical Columns Statistics
-        f.write("## Numerical Columns Statistics\n\n")
-        for col, stats in num_stats.items():
-            f.write(f"### {col}\n\n")
-            table = "| Statistic | Value |\n|-----------|-------|\n"
-            for stat, val in stats.items():
-                if isinstance(val, (int, float)) and not pd.isna(val):
-                    table += f"| {stat} | {val:.2f} |\n"
-                else:
-                    table += f"| {stat} | {val} |\n"
-            f.write(table + "\n")
-        
-        # Categorical Columns Analysis
-        f.write("## Categorical Columns Analysis\n\n")
-        for col, df_stats in cat_stats.items():
-            f.write(f"### {col}\n\n")
-            table = "| Value | Count | Percentage |\n|-------|-------|------------|\n"
-            for idx, row in df_stats.iterrows():
-                table += f"| {idx} | {row['Count']} | {row['Percentage']:.2f}% |\n"
-            f.write(table + "\n")
+    if df is not None:
+        total_records = len(df)
+        total_columns = len(df.columns)
+    sections = report_sections(num_stats, cat_stats, total_records, total_columns)
+    return write_report(sections, output_file, formats=formats)
 
-def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate the user data analysis report.")
+    parser.add_argument('--streaming', action='store_true',
+                        help="compute all statistics in one chunked pass over the CSV "
+                             "without loading it")
+    parser.add_argument('--exact', action='store_true',
+                        help="with --streaming, keep values for exact median/percentiles "
+                             "and exact category counts")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help="rows per chunk in streaming mode")
+    parser.add_argument('--chunk-mb', type=float, default=None, metavar='MB',
+                        help="parse the CSV in chunks of about this many MB; the loaded "
+                             "table is still held in memory (use --streaming for flat memory)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only process rows appended since the last run")
+    parser.add_argument('--state-file', default='users_analysis.state.json',
+                        help="aggregates persisted between incremental runs")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="analyse columns in parallel across N processes")
+    parser.add_argument('--top-k', type=int, default=5,
+                        help="number of most frequent values per categorical column")
+    parser.add_argument('--approximate-categorical', action='store_true',
+                        help="bounded-memory heavy hitters and distinct counts")
+    parser.add_argument('--heavy-hitter-error', type=float, default=DEFAULT_HEAVY_HITTER_ERROR,
+                        help="max count overestimate as a fraction of rows")
+    parser.add_argument('--sqlite', metavar='DB',
+                        help="compute the statistics inside this SQLite database instead of pandas")
+    parser.add_argument('--postgres', action='store_true',
+                        help="compute the statistics in PostgreSQL (DB_* environment variables)")
+    parser.add_argument('--formats', default='md',
+                        help=f"comma-separated report formats: {', '.join(WRITERS)}")
+    parser.add_argument('--profile', action='store_true',
+                        help="record stage timings and memory into <report>.profile.json "
+                             "and a table at the end of the report")
+    args = parser.parse_args()
+    unknown = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip() not in WRITERS]
+    if unknown:
+        parser.error(f"unknown report format(s): {', '.join(unknown)} "
+                     f"(choose from {', '.join(WRITERS)})")
+    return args
+
+def run_analysis(args, file_path, output_file):
     """
-    Main function to orchestrate the data analysis.
+    Compute the statistics and write the report(s) for the chosen backend.
     """
-    file_path = 'users_data4.csv'
-    output_file = 'users_analysis.md'
+    formats = tuple(fmt.strip() for fmt in args.formats.split(','))
+    
+    if args.sqlite or args.postgres:
+        with profiler.span('sql_analysis') as span:
+            if args.sqlite:
+                with closing(sqlite3.connect(args.sqlite)) as connection:
+                    results = analyze_table_sql(connection, top_k=args.top_k)
+            else:
+                # Imported here so the pandas-only report does not need psycopg
+                from users_db import conninfo_from_env, get_pool
+                with get_pool(conninfo_from_env()).connection() as connection:
+                    results = analyze_table_sql(connection, top_k=args.top_k)
+            num_stats, cat_stats, total_records, total_columns = results
+            span.rows = total_records
+        with profiler.span('report'):
+            generate_markdown_report(None, num_stats, cat_stats, output_file,
+                                     total_records=total_records, total_columns=total_columns,
+                                     formats=formats)
+        return True
+    
+    if args.streaming:
+        with profiler.span('streaming_analysis') as span:
+            num_stats, cat_stats, total_records, total_columns = streaming_analysis(
+                file_path, chunksize=args.chunksize, exact=args.exact, top_k=args.top_k,
+                error=args.heavy_hitter_error
+            )
+            span.rows = total_records
+        with profiler.span('report'):
+            generate_markdown_report(None, num_stats, cat_stats, output_file,
+                                     total_records=total_records, total_columns=total_columns,
+                                     formats=formats)
+        return True
+    
+    if args.incremental:
+        with profiler.span('incremental_analysis') as span:
+            state = incremental_analysis(file_path, args.state_file,
+                                         chunksize=args.chunksize, exact=args.exact)
+            span.rows = state.total_records
+        with profiler.span('report'):
+            generate_markdown_report(None, state.num_stats(), state.cat_stats(args.top_k),
+                                     output_file, total_records=state.total_records,
+                                     total_columns=len(state.numeric_cols) + len(state.other_cols),
+                                     formats=formats)
+        return True
     
     # Load data
-    df = load_data(file_path)
-    if df is None:
-        return
+    with profiler.span('load_data') as span:
+        df = load_data(file_path, memory_limit_mb=args.chunk_mb)
+        if df is None:
+            return False
+        span.rows = len(df)
     
     # Identify column types
     num_cols = df.select_dtypes(include=['number']).columns
     cat_cols = df.select_dtypes(exclude=['number']).columns
     
     # Perform numerical analysis
-    num_stats = {}
-    for col in num_cols:
-        num_stats[col] = numerical_analysis(df, col)
+    num_tasks = [(numerical_analysis, col) for col in num_cols]
     
-    # Perform categorical analysis
-    cat_stats = {}
-    for col in cat_cols:
-        cat_stats[col] = categorical_analysis(df, col)
+    # Perform categorical analysis (all columns in parallel with --workers)
+    analyze_categorical = partial(categorical_analysis, top_k=args.top_k,
+                                  approximate=args.approximate_categorical,
+                                  error=args.heavy_hitter_error)
+    cat_tasks = [(analyze_categorical, col) for col in cat_cols]
+    with profiler.span('column_analysis', rows=len(df)):
+        results = analyze_columns(df, num_tasks + cat_tasks, args.workers)
+    num_stats = dict(zip(num_cols, results[:len(num_tasks)]))
+    cat_stats = dict(zip(cat_cols, results[len(num_tasks):]))
     
     # Generate report
-    generate_markdown_report(df, num_stats, cat_stats, output_file)
+    with profiler.span('report'):
+        generate_markdown_report(df, num_stats, cat_stats, output_file, formats=formats)
+    return True
+
+def main():
+    """
+    Main function to orchestrate the data analysis.
+    """
+    args = parse_args()
+    file_path = 'users_data4.csv'
+    output_file = 'users_analysis.md'
+    if args.profile:
+        profiler.enable()
+    
+    with profiler.span('total'):
+        done = run_analysis(args, file_path, output_file)
+    if not done:
+        return
     print(f"Analysis report generated: {output_file}")
+    if args.profile:
+        print(f"Profile written: {profiler.write_outputs(output_file)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
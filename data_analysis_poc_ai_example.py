@@ -1,27 +1,40 @@
-import pandas as pd
+import numpy as np
 import os
-import matplotlib.pyplot as plt
+import argparse
 import google.generativeai as genai
 from datetime import datetime
 
+import charts
+import fetch_user_data
+import prompt_digest
+import report_rendering
+from charts import render_charts, user_chart_specs
+from data_loading import read_users_csv
+from fetch_user_data import export_users_csv
+from llm_cache import cached_completion
+from pipeline import FileInput, Pipeline, PipelineError, Stage
+from profiling import profiler
+from prompt_digest import DEFAULT_SAMPLE_ROWS, build_digest, stratified_sample
+from report_rendering import bullets, format_value, heading, image, paragraph, table, write_report
+
 # Nastavenie API kľúča pre Google Gemini
 # Poznámka: Nastavte environmentálnu premennú GOOGLE_API_KEY s vaším API kľúčom
 genai.configure(api_key='')
 
-def nacitaj_data(subor):
+GEMINI_MODEL = 'gemini-1.5-flash-latest'
+# Horná hranica tokenov pre súhrn štatistík a vzorku dát v prompte
+LIMIT_TOKENOV_SUHRNU = 600
+CHYBA_GEMINI = "Nebolo možné získať analýzu od AI."
+
+def nacitaj_data(subor, velkost_casti_mb=None):
     """
     Načíta CSV súbor s údajmi používateľov.
     Spracuje chýbajúce hodnoty: pre numerické stĺpce použije medián, pre kategorické odstráni riadky.
+    S velkost_casti_mb sa súbor parsuje po častiach približne tejto veľkosti v MB;
+    výsledná tabuľka je však v pamäti celá.
     """
     try:
-        df = pd.read_csv(subor)
-        # Spracovanie chýbajúcich hodnôt
-        for stlpec in df.columns:
-            if df[stlpec].dtype in ['int64', 'float64']:
-                df[stlpec].fillna(df[stlpec].median(), inplace=True)
-            else:
-                df.dropna(subset=[stlpec], inplace=True)
-        return df
+        return read_users_csv(subor, memory_limit_mb=velkost_casti_mb)
     except FileNotFoundError:
         print(f"Chyba: Súbor '{subor}' nebol nájdený.")
         return None
@@ -51,50 +64,29 @@ def vypocitaj_zakladne_statistiky(df):
         }
     return statistiky
 
-def vytvor_grafy(df, adresar_grafov):
+def vytvor_grafy(df, adresar_grafov, pocet_procesov=None):
     """
     Vytvorí a uloží grafy pre vizualizáciu dát.
+    Dáta sa najprv zhrnú (histogram, top 5, LTTB výber bodov časovej rady),
+    takže čas kreslenia nezávisí od počtu riadkov; grafy sa kreslia paralelne v procesoch.
     """
-    os.makedirs(adresar_grafov, exist_ok=True)
-
-    # Histogram pre platy
-    plt.figure(figsize=(10, 6))
-    plt.hist(df['salary'], bins=10, edgecolor='black')
-    plt.title('Distribúcia platov')
-    plt.xlabel('Plat')
-    plt.ylabel('Počet používateľov')
-    plt.savefig(os.path.join(adresar_grafov, 'histogram_platov.png'))
-    plt.close()
-
-    # Stĺpcový graf pre top 5 povolaní
-    top_povolania = df['occupation'].value_counts().head(5)
-    plt.figure(figsize=(10, 6))
-    top_povolania.plot(kind='bar')
-    plt.title('Top 5 povolaní')
-    plt.xlabel('Povolanie')
-    plt.ylabel('Počet')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(os.path.join(adresar_grafov, 'top_povolania.png'))
-    plt.close()
-
-    # Čiarový graf pre platy podľa dátumu vytvorenia (ak je možné zoradiť)
-    df_sorted = df.sort_values('created_at')
-    plt.figure(figsize=(10, 6))
-    plt.plot(df_sorted['created_at'], df_sorted['salary'], marker='o')
-    plt.title('Platy podľa dátumu vytvorenia')
-    plt.xlabel('Dátum vytvorenia')
-    plt.ylabel('Plat')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(os.path.join(adresar_grafov, 'platy_podla_datumu.png'))
-    plt.close()
-
-def analyzuj_s_gemini(statistiky, df_info):
+    specifikacie = user_chart_specs(
+        df, adresar_grafov,
+        ('histogram_platov.png', 'top_povolania.png', 'platy_podla_datumu.png'),
+        timeline='line'
+    )
+    return render_charts(specifikacie, pocet_procesov)
+
+def analyzuj_s_gemini(statistiky, df_info, df=None, limit_tokenov=LIMIT_TOKENOV_SUHRNU):
     """
     Použije Google Gemini na analýzu dát na základe štatistík.
-    Vráti odpoveď od AI.
+    Štatistiky (a vzorka riadkov z df) idú do promptu ako kompaktný súhrn s limitom tokenov.
+    Vráti odpoveď od AI. Rovnaký prompt sa zodpovie z cache (llm_cache) bez volania API.
     """
+    suhrn, pocet_tokenov = build_digest(statistiky, df=df, max_tokens=limit_tokenov,
+                                        strata_column='occupation')
+    print(f"Súhrn pre prompt: {pocet_tokenov} tokenov")
+
     prompt = f"""
     Analyzujte nasledujúce údaje o používateľoch. Poskytnite prehľadné zhrnutie, kľúčové poznatky a odporúčania.
 
@@ -103,8 +95,8 @@ def analyzuj_s_gemini(statistiky, df_info):
     - Počet stĺpcov: {df_info['pocet_stlpcov']}
     - Stĺpce: {', '.join(df_info['stlpce'])}
 
-    Štatistiky pre numerické stĺpce:
-    {statistiky}
+    Štatistiky pre numerické stĺpce (a vzorka riadkov):
+{suhrn}
 
     Poskytnite analýzu v slovenčine, ktorá zahŕňa:
     1. Prehľad dát
@@ -112,90 +104,141 @@ def analyzuj_s_gemini(statistiky, df_info):
     3. Odporúčania pre ďalšie kroky
     """
 
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash-latest')
+    def zavolaj_gemini():
+        model = genai.GenerativeModel(GEMINI_MODEL)
         response = model.generate_content(prompt)
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            profiler.record_tokens(usage.prompt_token_count, usage.candidates_token_count)
         return response.text
+
+    try:
+        return cached_completion('gemini', GEMINI_MODEL, prompt, zavolaj_gemini)
     except Exception as e:
         print(f"Chyba pri komunikácii s Gemini: {e}")
-        return "Nebolo možné získať analýzu od AI."
+        return CHYBA_GEMINI
 
-def vytvor_markdown_report(analyza_gemini, statistiky, df_info, adresar_grafov, vystupny_subor):
+def sekcie_reportu(analyza_gemini, statistiky, df_info, adresar_grafov):
+    """
+    Postupne vracia sekcie reportu (pozri report_rendering).
+    """
+    yield heading("Analýza údajov používateľov pomocou AI (Gemini)", level=1)
+    yield paragraph(f"*Vygenerované dňa: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*")
+
+    # Prehľad dát
+    yield heading("Prehľad dát")
+    yield bullets([
+        ("Celkový počet záznamov", df_info['pocet_zaznamov']),
+        ("Počet stĺpcov", df_info['pocet_stlpcov']),
+        ("Stĺpce", ', '.join(df_info['stlpce']))
+    ])
+
+    # Štatistiky
+    yield heading("Štatistiky numerických stĺpcov")
+    for stlpec, stats in statistiky.items():
+        yield heading(stlpec, level=3)
+        yield table(["Štatistika", "Hodnota"],
+                    [list(stats.keys()), np.array(list(stats.values()), dtype=object)],
+                    formats=[None, format_value])
+
+    # Grafy
+    yield heading("Grafy")
+    grafy = [
+        ('histogram_platov.png', 'Distribúcia platov'),
+        ('top_povolania.png', 'Top 5 povolaní'),
+        ('platy_podla_datumu.png', 'Platy podľa dátumu vytvorenia')
+    ]
+    for obrazok, popis in grafy:
+        cesta = os.path.join(adresar_grafov, obrazok)
+        if os.path.exists(cesta):
+            yield heading(popis, level=3)
+            yield image(popis, cesta)
+
+    # Analýza od Gemini
+    yield heading("AI Analýza (Gemini)")
+    yield paragraph(analyza_gemini)
+
+def vytvor_markdown_report(analyza_gemini, statistiky, df_info, adresar_grafov, vystupny_subor,
+                           formaty=('md',)):
     """
     Vytvorí Markdown súbor s reportom analýzy.
+    Ďalšie formáty ('html', 'json') sa zapíšu vedľa Markdown súboru.
     """
-    with open(vystupny_subor, 'w', encoding='utf-8') as f:
-        f.write("# Analýza údajov používateľov pomocou AI (Gemini)\n\n")
-        f.write(f"*Vygenerované dňa: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
-
-        # Prehľad dát
-        f.write("## Prehľad dát\n\n")
-        f.write(f"- **Celkový počet záznamov:** {df_info['pocet_zaznamov']}\n")
-        f.write(f"- **Počet stĺpcov:** {df_info['pocet_stlpcov']}\n")
-        f.write(f"- **Stĺpce:** {', '.join(df_info['stlpce'])}\n\n")
-
-        # Štatistiky
-        f.write("## Štatistiky numerických stĺpcov\n\n")
-        for stlpec, stats in statistiky.items():
-            f.write(f"### {stlpec}\n\n")
-            tabulka = "| Štatistika | Hodnota |\n|------------|--------|\n"
-            for stat, hodnota in stats.items():
-                if isinstance(hodnota, (int, float)) and not pd.isna(hodnota):
-                    tabulka += f"| {stat} | {hodnota:.2f} |\n"
-                else:
-                    tabulka += f"| {stat} | {hodnota} |\n"
-            f.write(tabulka + "\n")
-
-        # Grafy
-        f.write("## Grafy\n\n")
-        grafy = [
-            ('histogram_platov.png', 'Distribúcia platov'),
-            ('top_povolania.png', 'Top 5 povolaní'),
-            ('platy_podla_datumu.png', 'Platy podľa dátumu vytvorenia')
-        ]
-        for obrazok, popis in grafy:
-            cesta = os.path.join(adresar_grafov, obrazok)
-            if os.path.exists(cesta):
-                f.write(f"### {popis}\n\n")
-                f.write(f"![{popis}]({cesta})\n\n")
+    sekcie = sekcie_reportu(analyza_gemini, statistiky, df_info, adresar_grafov)
+    return write_report(sekcie, vystupny_subor, formats=formaty)
 
-        # Analýza od Gemini
-        f.write("## AI Analýza (Gemini)\n\n")
-        f.write(analyza_gemini + "\n\n")
+def informacie_o_datach(df):
+    return {
+        'pocet_zaznamov': len(df),
+        'pocet_stlpcov': len(df.columns),
+        'stlpce': list(df.columns)
+    }
 
-def hlavna_funkcia():
+def zapis_report(analyza_gemini, statistiky, df_info, grafy, adresar_grafov, vystupny_subor):
+    """
+    Etapa pipeline: report sa zapisuje až keď sú grafy (vstup grafy) hotové.
+    """
+    return vytvor_markdown_report(analyza_gemini, statistiky, df_info, adresar_grafov, vystupny_subor)
+
+def hlavna_funkcia(databaza=None, pouzi_cache=True, profil=False):
     """
     Hlavná funkcia na orchestráciu analýzy dát.
+    Jednotlivé kroky sú etapy pipeline: etapa, ktorej vstupy ani kód sa nezmenili,
+    sa načíta z cache; grafy a analýza Gemini bežia súčasne.
+    S databaza sa CSV najprv exportuje zo SQLite (fetch_user_data).
+    S profil sa časy a pamäť etáp zapíšu do JSON a ako tabuľka na koniec reportu.
     """
+    if profil:
+        profiler.enable()
     subor_dat = 'users_data4.csv'
     vystupny_subor = 'analyza_dat_ai.md'
     adresar_grafov = 'grafy'
+    subory_grafov = [os.path.join(adresar_grafov, nazov) for nazov in
+                     ('histogram_platov.png', 'top_povolania.png', 'platy_podla_datumu.png')]
+
+    if databaza is not None:
+        zdroj = [
+            FileInput('databaza', databaza),
+            Stage('data', export_users_csv, inputs=['databaza'], params={'output_file': subor_dat},
+                  outputs=[subor_dat], depends=[fetch_user_data])
+        ]
+    else:
+        zdroj = [FileInput('data', subor_dat)]
+
+    pipeline = Pipeline(zdroj + [
+        # DataFrame sa neukladá do cache, načíta sa len keď ho potrebuje niektorá etapa
+        Stage('nacitanie', nacitaj_data, inputs=['data'], cache=False),
+        Stage('info', informacie_o_datach, inputs=['nacitanie']),
+        Stage('statistiky', vypocitaj_zakladne_statistiky, inputs=['nacitanie']),
+        # depends: volané funkcie a moduly, ich zmena tiež zneplatní cache etapy
+        Stage('vzorka', stratified_sample, inputs=['nacitanie'],
+              params={'rows': DEFAULT_SAMPLE_ROWS, 'strata_column': 'occupation'},
+              depends=[prompt_digest]),
+        Stage('grafy', vytvor_grafy, inputs=['nacitanie'], params={'adresar_grafov': adresar_grafov},
+              outputs=subory_grafov, depends=[charts]),
+        Stage('gemini', analyzuj_s_gemini, inputs=['statistiky', 'info', 'vzorka'],
+              cache_when=lambda analyza: analyza != CHYBA_GEMINI, depends=[prompt_digest]),
+        Stage('report', zapis_report, inputs=['gemini', 'statistiky', 'info', 'grafy'],
+              params={'adresar_grafov': adresar_grafov, 'vystupny_subor': vystupny_subor},
+              outputs=[vystupny_subor],
+              depends=[vytvor_markdown_report, sekcie_reportu, report_rendering])
+    ], use_cache=pouzi_cache)
 
-    # Načítanie dát
-    df = nacitaj_data(subor_dat)
-    if df is None:
+    try:
+        pipeline.run()
+    except PipelineError as e:
+        print(f"Chyba: {e}")
         return
 
-    # Informácie o dátach
-    df_info = {
-        'pocet_zaznamov': len(df),
-        'pocet_stlpcov': len(df.columns),
-        'stlpce': list(df.columns)
-    }
-
-    # Výpočet štatistík
-    statistiky = vypocitaj_zakladne_statistiky(df)
-
-    # Vytvorenie grafov
-    vytvor_grafy(df, adresar_grafov)
-
-    # Analýza pomocou Gemini
-    analyza_gemini = analyzuj_s_gemini(statistiky, df_info)
-
-    # Vytvorenie Markdown reportu
-    vytvor_markdown_report(analyza_gemini, statistiky, df_info, adresar_grafov, vystupny_subor)
-
     print(f"Analýza dokončená. Výsledky uložené v '{vystupny_subor}' a grafy v adresári '{adresar_grafov}'.")
+    if profil:
+        print(f"Profil behu uložený v '{profiler.write_outputs(vystupny_subor, 'Profil behu')}'.")
 
 if __name__ == "__main__":
-    hlavna_funkcia()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Analýza údajov používateľov pomocou Gemini.")
+    parser.add_argument('--databaza', help="SQLite databáza, z ktorej sa najprv exportuje CSV")
+    parser.add_argument('--bez-cache', action='store_true', help="spustiť všetky etapy nanovo")
+    parser.add_argument('--profile', action='store_true',
+                        help="zaznamenať čas a pamäť jednotlivých etáp")
+    args = parser.parse_args()
+    hlavna_funkcia(args.databaza, pouzi_cache=not args.bez_cache, profil=args.profile)
\ No newline at end of file
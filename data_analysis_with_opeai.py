@@ -1,17 +1,20 @@
 from openai import OpenAI
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-from collections import Counter
 import numpy as np
 
+from charts import render_charts, user_chart_specs
+from data_loading import load_users_table
+from llm_cache import cached_completion
+from report_rendering import bullets, heading, image, paragraph, table, write_report
+
 client = OpenAI(
   base_url="https://openrouter.ai/api/v1",
   api_key=os.getenv("OPENROUTER_API_KEY"),
 )
 
-# Load the CSV file
-df = pd.read_csv('users_data4.csv')
+# Load the CSV file (through the columnar cache)
+df = load_users_table('users_data4.csv')
 
 # Basic data overview
 total_records = len(df)
@@ -48,36 +51,15 @@ for col in ['first_name', 'last_name', 'email', 'occupation', 'created_at']:
             analysis.append({'Value': value, 'Count': count, 'Percentage': f'{percentage}%'})
         categorical_analysis[col] = analysis
 
-# Generate plots
-plt.figure(figsize=(10, 6))
-df['salary'].hist(bins=10)
-plt.title('Distribúcia platov')
-plt.xlabel('Plat')
-plt.ylabel('Počet')
-plt.savefig('grafy/histogram_platov_ml.png')
-plt.close()
-
-# Top occupations
+# Generate plots (pre-aggregated, so large tables do not slow them down)
 occupation_counts = df['occupation'].value_counts().head(5)
-plt.figure(figsize=(10, 6))
-occupation_counts.plot(kind='bar')
-plt.title('Top 5 povolaní')
-plt.xlabel('Povolanie')
-plt.ylabel('Počet')
-plt.xticks(rotation=45)
-plt.savefig('grafy/top_povolania_ml.png')
-plt.close()
-
-# Salaries by date
 df['created_at'] = pd.to_datetime(df['created_at'])
-plt.figure(figsize=(10, 6))
-plt.scatter(df['created_at'], df['salary'])
-plt.title('Platy podľa dátumu vytvorenia')
-plt.xlabel('Dátum')
-plt.ylabel('Plat')
-plt.xticks(rotation=45)
-plt.savefig('grafy/platy_podla_datumu_ml.png')
-plt.close()
+chart_specs = user_chart_specs(
+    df, 'grafy',
+    ('histogram_platov_ml.png', 'top_povolania_ml.png', 'platy_podla_datumu_ml.png'),
+    timeline='scatter'
+)
+render_charts(chart_specs, workers=1)
 
 # AI Analysis using OpenAI
 data_summary = f"""
@@ -101,64 +83,61 @@ Analyzujte nasledujúce dáta o používateľoch a poskytnite prehľadnú analý
 Poskytnite analýzu v niekoľkých odsekoch.
 """
 
-try:
+MODEL = 'mistralai/mistral-7b-instruct:free'  # Assuming this model works, adjust if needed
+
+
+def ask_model():
     response = client.chat.completions.create(
-        model='mistralai/mistral-7b-instruct:free',  # Assuming this model works, adjust if needed
+        model=MODEL,
         messages=[{"role": "user", "content": prompt}]
     )
-    ai_analysis = response.choices[0].message.content
+    return response.choices[0].message.content
+
+
+# Unchanged statistics give the same prompt; the answer then comes from llm_cache
+try:
+    ai_analysis = cached_completion('openrouter', MODEL, prompt, ask_model)
 except Exception as e:
     ai_analysis = f"Nebolo možné získať analýzu od AI. Chyba: {str(e)}"
 
 # Generate Markdown report
-markdown_content = f"""# Analýza údajov používateľov pomocou AI (Mistral)
-
-*Vygenerované dňa: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}*
-
-## Prehľad dát
-
-- **Celkový počet záznamov:** {total_records}
-- **Počet stĺpcov:** {total_columns}
-- **Stĺpce:** {', '.join(columns)}
-
-## Štatistiky numerických stĺpcov
-
-"""
-
-for col, stats in numerical_stats.items():
-    markdown_content += f"### {col}\n\n| Štatistika | Hodnota |\n|------------|--------|\n"
-    for stat, value in stats.items():
-        markdown_content += f"| {stat} | {value} |\n"
-    markdown_content += "\n"
-
-markdown_content += "## Kategorické analýzy stĺpcov\n\n"
-
-for col, analysis in categorical_analysis.items():
-    markdown_content += f"### {col}\n\n| Hodnota | Počet | Percento |\n|---------|-------|----------|\n"
-    for item in analysis:
-        markdown_content += f"| {item['Value']} | {item['Count']} | {item['Percentage']} |\n"
-    markdown_content += "\n"
-
-markdown_content += """## Grafy
-
-### Distribúcia platov
-
-![Distribúcia platov](grafy/histogram_platov_ml.png)
-
-### Top 5 povolaní
-
-![Top 5 povolaní](grafy/top_povolania_ml.png)
-
-### Platy podľa dátumu vytvorenia
-
-![Platy podľa dátumu vytvorenia](grafy/platy_podla_datumu_ml.png)
-
-## AI Analýza (Mistral)
-
-""" + ai_analysis
+def report_sections():
+    yield heading("Analýza údajov používateľov pomocou AI (Mistral)", level=1)
+    yield paragraph(f"*Vygenerované dňa: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}*")
+
+    yield heading("Prehľad dát")
+    yield bullets([
+        ("Celkový počet záznamov", total_records),
+        ("Počet stĺpcov", total_columns),
+        ("Stĺpce", ', '.join(columns))
+    ])
+
+    yield heading("Štatistiky numerických stĺpcov")
+    for col, stats in numerical_stats.items():
+        yield heading(col, level=3)
+        yield table(["Štatistika", "Hodnota"],
+                    [list(stats.keys()), np.array(list(stats.values()), dtype=object)])
+
+    yield heading("Kategorické analýzy stĺpcov")
+    for col, analysis in categorical_analysis.items():
+        yield heading(col, level=3)
+        yield table(["Hodnota", "Počet", "Percento"],
+                    [np.array([item[key] for item in analysis], dtype=object)
+                     for key in ('Value', 'Count', 'Percentage')])
+
+    yield heading("Grafy")
+    for file_name, title in [
+        ('histogram_platov_ml.png', 'Distribúcia platov'),
+        ('top_povolania_ml.png', 'Top 5 povolaní'),
+        ('platy_podla_datumu_ml.png', 'Platy podľa dátumu vytvorenia')
+    ]:
+        yield heading(title, level=3)
+        yield image(title, f'grafy/{file_name}')
+
+    yield heading("AI Analýza (Mistral)")
+    yield paragraph(ai_analysis)
 
 # Write to file
-with open('ml_user_analysis.md', 'w', encoding='utf-8') as f:
-    f.write(markdown_content)
+write_report(report_sections(), 'ml_user_analysis.md')
 
 print("Analýza dokončená. Výstup uložený v ml_user_analysis.md")
\ No newline at end of file
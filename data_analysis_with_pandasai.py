@@ -4,21 +4,26 @@ from pandasai import Agent
 import pandasai as pai
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-from collections import Counter
 import numpy as np
 
+from charts import render_charts, user_chart_specs
+from data_loading import load_users_table
+from pandasai_code_cache import CodeCache
+from prompt_digest import build_digest
+from report_rendering import bullets, heading, image, paragraph, table, write_report
+
 # Initialize PandasAI with OpenAI (using OpenRouter)
+MODEL = "openrouter/mistralai/mistral-7b-instruct:free"
 llm = LiteLLM(
     api_key=os.getenv("OPENROUTER_API_KEY"),
-    model="openrouter/mistralai/mistral-7b-instruct:free"
+    model=MODEL
     #,base_url="https://openrouter.ai/api/v1"
 )
 
 pai.config.set({"llm": llm})
 
-# Load the CSV file
-df = pd.read_csv('users_data4.csv')
+# Load the CSV file (through the columnar cache)
+df = load_users_table('users_data4.csv')
 
 # Basic data overview
 total_records = len(df)
@@ -55,118 +60,89 @@ for col in ['first_name', 'last_name', 'email', 'occupation', 'created_at']:
             analysis.append({'Value': value, 'Count': count, 'Percentage': f'{percentage}%'})
         categorical_analysis[col] = analysis
 
-# Generate plots
-plt.figure(figsize=(10, 6))
-df['salary'].hist(bins=10)
-plt.title('Distribúcia platov')
-plt.xlabel('Plat')
-plt.ylabel('Počet')
-plt.savefig('grafy/histogram_platov_pandasai.png')
-plt.close()
-
-# Top occupations
-occupation_counts = df['occupation'].value_counts().head(5)
-plt.figure(figsize=(10, 6))
-occupation_counts.plot(kind='bar')
-plt.title('Top 5 povolaní')
-plt.xlabel('Povolanie')
-plt.ylabel('Počet')
-plt.xticks(rotation=45)
-plt.savefig('grafy/top_povolania_pandasai.png')
-plt.close()
-
-# Salaries by date
+# Generate plots (pre-aggregated, so large tables do not slow them down)
 df['created_at'] = pd.to_datetime(df['created_at'])
-plt.figure(figsize=(10, 6))
-plt.scatter(df['created_at'], df['salary'])
-plt.title('Platy podľa dátumu vytvorenia')
-plt.xlabel('Dátum')
-plt.ylabel('Plat')
-plt.xticks(rotation=45)
-plt.savefig('grafy/platy_podla_datumu_pandasai.png')
-plt.close()
+chart_specs = user_chart_specs(
+    df, 'grafy',
+    ('histogram_platov_pandasai.png', 'top_povolania_pandasai.png', 'platy_podla_datumu_pandasai.png'),
+    timeline='scatter'
+)
+render_charts(chart_specs, workers=1)
 
 # PandasAI Analysis
+# The statistics above are computed on the whole table; the prompt text gets
+# a token-budgeted digest of them, so its size does not grow with the data.
+# The agent runs its generated code on the whole table.
+DIGEST_MAX_TOKENS = 600
+
 #df_ai = SmartDataframe(df, config={"llm": llm})
 agent = Agent(df)
-
-data_summary = f"""
-Celkový počet záznamov: {total_records}
-Počet stĺpcov: {total_columns}
-Stĺpce: {', '.join(columns)}
-
-Štatistiky pre salary:
-Priemer: {numerical_stats.get('salary', {}).get('Priemer', 'N/A')}
-Medián: {numerical_stats.get('salary', {}).get('Medián', 'N/A')}
-Rozsah: {numerical_stats.get('salary', {}).get('Rozsah', 'N/A')}
-
-Top povolania: {', '.join(occupation_counts.index.tolist())}
-"""
-
+# Code PandasAI generated for a question is re-run on data with the same schema
+code_cache = CodeCache()
+
+top_counts = {
+    col: pd.Series([item['Count'] for item in analysis], index=[item['Value'] for item in analysis])
+    for col, analysis in categorical_analysis.items() if col != 'email'
+}
+data_summary, digest_tokens = build_digest(
+    numerical_stats, top_counts, total_records=total_records, columns=columns,
+    max_tokens=DIGEST_MAX_TOKENS, sample_rows=0)
+print(f"Prompt digest: {digest_tokens} tokens")
+
+# The question is the code cache key; the digest changes with the data, so it is not
+QUESTION = "Analyzujte nasledujúce dáta o používateľoch a poskytnite prehľadnú analýzu v slovenčine. Zahŕňajte trendy, zaujímavé poznatky a odporúčania."
 prompt = f"""
-Analyzujte nasledujúce dáta o používateľoch a poskytnite prehľadnú analýzu v slovenčine. Zahŕňajte trendy, zaujímavé poznatky a odporúčania.
+{QUESTION}
 
 {data_summary}
 
 Poskytnite analýzu v niekoľkých odsekoch.
 """
 
-
-
+# Cached code is re-run on the current data, so fresh data gets a fresh answer
 try:
-    ai_analysis = agent.chat(prompt)
+    ai_analysis = str(code_cache.chat(agent, df, QUESTION, prompt=prompt))
 except Exception as e:
     ai_analysis = f"Nebolo možné získať analýzu od PandasAI. Chyba: {str(e)}"
 
 # Generate Markdown report
-markdown_content = f"""# Analýza údajov používateľov pomocou PandasAI
-
-*Vygenerované dňa: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}*
-
-## Prehľad dát
-
-- **Celkový počet záznamov:** {total_records}
-- **Počet stĺpcov:** {total_columns}
-- **Stĺpce:** {', '.join(columns)}
-
-## Štatistiky numerických stĺpcov
-
-"""
-
-for col, stats in numerical_stats.items():
-    markdown_content += f"### {col}\n\n| Štatistika | Hodnota |\n|------------|--------|\n"
-    for stat, value in stats.items():
-        markdown_content += f"| {stat} | {value} |\n"
-    markdown_content += "\n"
-
-markdown_content += "## Kategorické analýzy stĺpcov\n\n"
-
-for col, analysis in categorical_analysis.items():
-    markdown_content += f"### {col}\n\n| Hodnota | Počet | Percento |\n|---------|-------|----------|\n"
-    for item in analysis:
-        markdown_content += f"| {item['Value']} | {item['Count']} | {item['Percentage']} |\n"
-    markdown_content += "\n"
-
-markdown_content += """## Grafy
-
-### Distribúcia platov
-
-![Distribúcia platov](grafy/histogram_platov_pandasai.png)
-
-### Top 5 povolaní
-
-![Top 5 povolaní](grafy/top_povolania_pandasai.png)
-
-### Platy podľa dátumu vytvorenia
-
-![Platy podľa dátumu vytvorenia](grafy/platy_podla_datumu_pandasai.png)
-
-## PandasAI Analýza
-
-""" + str(ai_analysis)
+def report_sections():
+    yield heading("Analýza údajov používateľov pomocou PandasAI", level=1)
+    yield paragraph(f"*Vygenerované dňa: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}*")
+
+    yield heading("Prehľad dát")
+    yield bullets([
+        ("Celkový počet záznamov", total_records),
+        ("Počet stĺpcov", total_columns),
+        ("Stĺpce", ', '.join(columns))
+    ])
+
+    yield heading("Štatistiky numerických stĺpcov")
+    for col, stats in numerical_stats.items():
+        yield heading(col, level=3)
+        yield table(["Štatistika", "Hodnota"],
+                    [list(stats.keys()), np.array(list(stats.values()), dtype=object)])
+
+    yield heading("Kategorické analýzy stĺpcov")
+    for col, analysis in categorical_analysis.items():
+        yield heading(col, level=3)
+        yield table(["Hodnota", "Počet", "Percento"],
+                    [np.array([item[key] for item in analysis], dtype=object)
+                     for key in ('Value', 'Count', 'Percentage')])
+
+    yield heading("Grafy")
+    for file_name, title in [
+        ('histogram_platov_pandasai.png', 'Distribúcia platov'),
+        ('top_povolania_pandasai.png', 'Top 5 povolaní'),
+        ('platy_podla_datumu_pandasai.png', 'Platy podľa dátumu vytvorenia')
+    ]:
+        yield heading(title, level=3)
+        yield image(title, f'grafy/{file_name}')
+
+    yield heading("PandasAI Analýza")
+    yield paragraph(str(ai_analysis))
 
 # Write to file
-with open('pandasai_user_analysis.md', 'w', encoding='utf-8') as f:
-    f.write(markdown_content)
+write_report(report_sections(), 'pandasai_user_analysis.md')
 
 print("Analýza dokončená. Výstup uložený v pandasai_user_analysis.md")
\ No newline at end of file
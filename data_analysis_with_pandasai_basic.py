@@ -5,6 +5,8 @@ from pandasai_litellm.litellm import LiteLLM
 import os
 import pandas as pd
 
+from pandasai_fastpath import FastPathResolver
+
 # Initialize PandasAI with OpenAI (using OpenRouter)
 llm = LiteLLM(
     api_key=os.getenv("OPENROUTER_API_KEY"),
@@ -24,6 +26,9 @@ df = pd.DataFrame(
 )
 
 agent = Agent(df)
-response = agent.chat("What is average salary?")
+# Simple aggregates are answered locally with pandas, other questions go to the LLM
+resolver = FastPathResolver(df)
+response = resolver.ask(agent, "What is average salary?")
 
-print(response)
\ No newline at end of file
+print(response)
+print(f"Fast path hit rate: {resolver.hit_rate:.0%}")
\ No newline at end of file
@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+from pandas.api.types import is_datetime64_dtype, is_numeric_dtype, union_categoricals
+
+from streaming_stats import DEFAULT_CHUNKSIZE, ExactQuantiles, QuantileSketch
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    # Without pyarrow the columnar cache is disabled and the CSV is parsed every time
+    pa = None
+
+# Explicit dtypes for the users export; columns missing from a file are skipped
+USER_DTYPES = {
+    'occupation': 'category',
+    'city': 'category',
+    'salary': 'float32'
+}
+USER_DATE_COLUMNS = ['created_at']
+
+# Rows sampled to estimate the in-memory size of one row
+SAMPLE_ROWS = 1000
+# Parsed chunks briefly exist twice (raw + cleaned), keep headroom for that
+MEMORY_SAFETY_FACTOR = 3
+MIN_CHUNKSIZE = 1000
+
+# Columnar cache written next to the CSV: <file>.arrow + <file>.arrow.json
+CACHE_SUFFIX = '.arrow'
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def csv_read_options(file_path):
+    """
+    Build read_csv keyword arguments (dtypes, date columns) for the columns
+    that are actually present in the file.
+    """
+    header = pd.read_csv(file_path, nrows=0).columns
+    return {
+        'dtype': {col: dtype for col, dtype in USER_DTYPES.items() if col in header},
+        'parse_dates': [col for col in USER_DATE_COLUMNS if col in header]
+    }
+
+
+def chunksize_for_memory_limit(file_path, memory_limit_mb, options):
+    """
+    Estimate how many rows fit into `memory_limit_mb` from a small sample.
+    This only sizes the parse chunks; it does not cap the whole load.
+    """
+    sample = pd.read_csv(file_path, nrows=SAMPLE_ROWS, **options)
+    if sample.empty:
+        return MIN_CHUNKSIZE
+    bytes_per_row = sample.memory_usage(deep=True).sum() / len(sample)
+    rows = int(memory_limit_mb * 1024 * 1024 / (bytes_per_row * MEMORY_SAFETY_FACTOR))
+    return max(rows, MIN_CHUNKSIZE)
+
+
+def split_columns(file_path, options):
+    """
+    Return (numerical columns, other columns) based on the parsed dtypes.
+    """
+    sample = pd.read_csv(file_path, nrows=SAMPLE_ROWS, **options)
+    numeric = [col for col in sample.columns if is_numeric_dtype(sample[col])]
+    other = [col for col in sample.columns if col not in numeric]
+    return numeric, other
+
+
+def column_medians(file_path, numeric_cols, chunksize, exact=True):
+    """
+    First pass over the numerical columns only, returning {column: median}.
+    exact=False uses the quantile sketch so this pass also runs in flat memory.
+    """
+    estimators = {
+        col: ExactQuantiles() if exact else QuantileSketch()
+        for col in numeric_cols
+    }
+    for chunk in pd.read_csv(file_path, usecols=numeric_cols, chunksize=chunksize):
+        for col in numeric_cols:
+            estimators[col].update(chunk[col].dropna().to_numpy())
+    return {col: estimator.quantile(0.5) for col, estimator in estimators.items()}
+
+
+def clean_chunk(chunk, medians, other_cols):
+    """
+    Fill numerical gaps with the medians and drop rows with missing
+    categorical values, each in one vectorized call.
+    """
+    return chunk.fillna(medians).dropna(subset=other_cols)
+
+
+def iter_clean_chunks(file_path, chunksize=None, memory_limit_mb=None, exact_median=True):
+    """
+    Stream the CSV as cleaned DataFrame chunks with explicit dtypes.
+    The chunk size is taken from `chunksize` or derived from `memory_limit_mb`.
+    """
+    options = csv_read_options(file_path)
+    if chunksize is None and memory_limit_mb is None:
+        chunksize = DEFAULT_CHUNKSIZE
+    elif chunksize is None:
+        chunksize = chunksize_for_memory_limit(file_path, memory_limit_mb, options)
+    numeric_cols, other_cols = split_columns(file_path, options)
+    medians = column_medians(file_path, numeric_cols, chunksize, exact=exact_median)
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, **options):
+        yield clean_chunk(chunk, medians, other_cols)
+
+
+def concat_chunks(chunks):
+    """
+    Concatenate cleaned chunks, keeping categorical columns categorical
+    (plain pd.concat falls back to object when the categories differ).
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return None
+    df = pd.concat(chunks, ignore_index=True)
+    for col in chunks[0].select_dtypes(include=['category']).columns:
+        df[col] = union_categoricals([chunk[col] for chunk in chunks])
+    return df
+
+
+def clean_frame(df):
+    """
+    Apply the median-fill and drop rules to a fully loaded DataFrame.
+    """
+    numeric_cols = [col for col in df.columns if is_numeric_dtype(df[col])]
+    other_cols = [col for col in df.columns if col not in numeric_cols]
+    medians = df[numeric_cols].median()
+    return clean_chunk(df, medians, other_cols)
+
+
+def cache_paths(csv_path):
+    table_path = csv_path + CACHE_SUFFIX
+    return table_path, table_path + '.json'
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_sha256(path)}
+
+
+def cache_is_valid(csv_path):
+    """
+    The cache is valid while the CSV keeps its size and mtime. If only the
+    mtime changed (file touched or rewritten), the content hash decides.
+    """
+    table_path, meta_path = cache_paths(csv_path)
+    if not (os.path.exists(table_path) and os.path.exists(meta_path)):
+        return False
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    stat = os.stat(csv_path)
+    if stat.st_size != meta['size']:
+        return False
+    if stat.st_mtime_ns == meta['mtime_ns']:
+        return True
+    if file_sha256(csv_path) != meta['sha256']:
+        return False
+    meta['mtime_ns'] = stat.st_mtime_ns
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return True
+
+
+def cache_schema(csv_path, options):
+    """
+    Declare the cache columns up front instead of inferring them per chunk,
+    with the types read_csv gives the sample: integers as nullable int64 (an
+    int column may get a gap later on; like read_csv, it then loads as
+    float64), floats and dates in their read_csv width and unit, and all
+    other columns as strings. A column with no values in the sample is taken
+    as text, since text columns are the ones left empty in the users export.
+    Returns (read_csv dtypes, Arrow schema).
+    """
+    sample = pd.read_csv(csv_path, nrows=SAMPLE_ROWS, **options)
+    dtypes = {}
+    fields = []
+    for col in sample.columns:
+        dtype = sample[col].dtype
+        if col in options['parse_dates'] and is_datetime64_dtype(dtype):
+            fields.append(pa.field(col, pa.from_numpy_dtype(dtype)))
+            continue
+        if is_numeric_dtype(dtype) and sample[col].notna().any():
+            if dtype.kind in 'iu':
+                dtypes[col] = 'Int64'
+                fields.append(pa.field(col, pa.int64()))
+            else:
+                dtypes[col] = dtype
+                fields.append(pa.field(col, pa.from_numpy_dtype(dtype)))
+        else:
+            dtypes[col] = 'object'
+            fields.append(pa.field(col, pa.string()))
+    return dtypes, pa.schema(fields)
+
+
+def build_cache(csv_path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Convert the CSV chunk by chunk into an uncompressed Arrow IPC file that
+    can be memory-mapped. Categorical columns are stored as plain strings,
+    because the chunks do not share one dictionary. Raises ValueError
+    (e.g. ArrowInvalid) if a chunk does not fit the declared schema.
+    """
+    table_path, meta_path = cache_paths(csv_path)
+    fingerprint = file_fingerprint(csv_path)
+    options = csv_read_options(csv_path)
+    dtypes, schema = cache_schema(csv_path, options)
+    tmp_path = table_path + '.tmp'
+    rows = 0
+    try:
+        with pa.ipc.new_file(tmp_path, schema) as writer:
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=dtypes,
+                                     parse_dates=options['parse_dates']):
+                writer.write_batch(pa.RecordBatch.from_pandas(chunk, schema=schema,
+                                                              preserve_index=False))
+                rows += len(chunk)
+        if not rows:
+            # Header-only CSV, nothing to cache
+            return False
+        os.replace(tmp_path, table_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprint, f)
+    return True
+
+
+def load_users_table(csv_path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Return the users table with explicit dtypes, without cleaning.
+    The CSV is converted once into a columnar cache; later calls memory-map
+    the cache and only rebuild it when the CSV changes. If the cache cannot
+    be built, the CSV is read directly.
+    """
+    if pa is None:
+        return pd.read_csv(csv_path, **csv_read_options(csv_path))
+    if not cache_is_valid(csv_path):
+        try:
+            built = build_cache(csv_path, chunksize)
+        except (ValueError, pa.ArrowException) as e:
+            print(f"Warning: columnar cache for '{csv_path}' not built ({e}), reading the CSV.")
+            built = False
+        if not built:
+            return pd.read_csv(csv_path, **csv_read_options(csv_path))
+    table = feather.read_table(cache_paths(csv_path)[0], memory_map=True)
+    categories = [
+        col for col, dtype in USER_DTYPES.items()
+        if dtype == 'category' and col in table.column_names
+    ]
+    return table.to_pandas(categories=categories)
+
+
+def read_users_csv(file_path, chunksize=None, memory_limit_mb=None, use_cache=True):
+    """
+    Read and clean the users CSV. Without chunksize/memory_limit_mb the whole
+    table is loaded (through the columnar cache when use_cache is set),
+    otherwise the CSV is parsed chunk by chunk. Either way the result is the
+    whole table, so memory_limit_mb bounds the parse chunks, not the peak;
+    use iter_clean_chunks to process the file in flat memory.
+    """
+    if chunksize is None and memory_limit_mb is None:
+        if use_cache:
+            return clean_frame(load_users_table(file_path))
+        return clean_frame(pd.read_csv(file_path, **csv_read_options(file_path)))
+    return concat_chunks(iter_clean_chunks(file_path, chunksize, memory_limit_mb))
@@ -1,24 +1,138 @@
-import sqlite3
+import argparse
 import csv
+import glob
+import json
+import os
+import sqlite3
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Parquet output needs pyarrow, CSV export works without it
+    pa = None
+
+# Rows fetched per keyset page, so memory does not grow with the table
+BATCH_SIZE = 50000
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+def iter_user_batches(conn, after_id=0, batch_size=BATCH_SIZE):
+    """
+    Page through the 'users' table by primary key (WHERE id > last id),
+    yielding (columns, rows) batches. Each page is an index range scan,
+    so already exported rows are never read again.
+    """
+    cursor = conn.cursor()
+    last_id = after_id
+    while True:
+        cursor.execute("SELECT * FROM users WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size))
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield columns, rows
+        last_id = rows[-1][columns.index('id')]
+
+def export_csv(batches, output_file, append=False):
+    """
+    Stream batches into a CSV file; in append mode the header is only
+    written when the file is new or empty. Returns (rows written, last id).
+    """
+    write_header = not (append and os.path.exists(output_file) and os.path.getsize(output_file) > 0)
+    total, last_id = 0, None
+    with open(output_file, 'a' if append else 'w', newline='', encoding='utf-8',
+              buffering=WRITE_BUFFER_SIZE) as csvfile:
+        writer = csv.writer(csvfile)
+        for columns, rows in batches:
+            if write_header:
+                writer.writerow(columns)
+                write_header = False
+            writer.writerows(rows)
+            total += len(rows)
+            last_id = rows[-1][columns.index('id')]
+    return total, last_id
+
+def export_parquet(batches, output_dir, append=False):
+    """
+    Stream batches into one Parquet part file inside output_dir. A full
+    export replaces the existing parts, an incremental one adds a new part.
+    Returns (rows written, last id).
+    """
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow.")
+    os.makedirs(output_dir, exist_ok=True)
+    if not append:
+        for part in glob.glob(os.path.join(output_dir, 'part-*.parquet')):
+            os.remove(part)
+    writer = None
+    part_path = None
+    total, last_id = 0, None
+    try:
+        for columns, rows in batches:
+            table = pa.Table.from_pydict(dict(zip(columns, map(list, zip(*rows)))),
+                                         schema=writer.schema if writer else None)
+            if writer is None:
+                first_id = rows[0][columns.index('id')]
+                part_path = os.path.join(output_dir, f'part-{first_id:012d}.parquet')
+                writer = pq.ParquetWriter(part_path, table.schema)
+            writer.write_table(table)
+            total += len(rows)
+            last_id = rows[-1][columns.index('id')]
+    finally:
+        if writer is not None:
+            writer.close()
+    return total, last_id
+
+def load_export_state(state_file):
+    if not os.path.exists(state_file):
+        return {'last_id': 0}
+    with open(state_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_export_state(state_file, state):
+    with open(state_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+
+def export_users_csv(database, output_file, batch_size=BATCH_SIZE):
+    """
+    Full export of the users table into output_file. Returns output_file.
+    """
+    conn = sqlite3.connect(database)
+    try:
+        export_csv(iter_user_batches(conn, batch_size=batch_size), output_file)
+    finally:
+        conn.close()
+    return output_file
 
-# Connect to the SQLite database
-conn = sqlite3.connect('database/test.db')
-cursor = conn.cursor()
+def main():
+    parser = argparse.ArgumentParser(description="Export the users table from SQLite.")
+    parser.add_argument('--database', default='database/test.db')
+    parser.add_argument('--output', default='users_data4.csv',
+                        help="CSV file, or directory of part files for parquet")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--incremental', action='store_true',
+                        help="only export rows with id above the last exported id")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
 
-# Query to fetch all data from the 'users' table (assuming the table name is 'users' based on the CSV example)
-cursor.execute("SELECT * FROM users")
-rows = cursor.fetchall()
+    state_file = args.output.rstrip('/\\') + '.export.json'
+    state = load_export_state(state_file) if args.incremental else {'last_id': 0}
+    if args.incremental and not os.path.exists(args.output):
+        state = {'last_id': 0}
 
-# Get column names from the cursor description
-columns = [desc[0] for desc in cursor.description]
+    # Connect to the SQLite database
+    conn = sqlite3.connect(args.database)
+    try:
+        batches = iter_user_batches(conn, after_id=state['last_id'], batch_size=args.batch_size)
+        export = export_parquet if args.format == 'parquet' else export_csv
+        total, last_id = export(batches, args.output, append=args.incremental)
+    finally:
+        # Close the connection
+        conn.close()
 
-# Write to CSV
-with open('users_data4.csv', 'w', newline='', encoding='utf-8') as csvfile:
-    writer = csv.writer(csvfile)
-    # Write header
-    writer.writerow(columns)
-    # Write data
-    writer.writerows(rows)
+    if last_id is not None:
+        save_export_state(state_file, {'last_id': last_id})
+    print(f"Exported {total} rows to {args.output}")
 
-# Close the connection
-conn.close()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,34 +1,63 @@
+import argparse
 import csv
 from faker import Faker
 import random
 
-# Initialize Faker
-faker = Faker()
-
-# Number of rows to generate
-num_rows = 100000
-
-# Generate data
-data = []
-for i in range(1, num_rows + 1):
-    row = {
-        'id': i,
-        'first_name': faker.first_name(),
-        'last_name': faker.last_name(),
-        'city': faker.city(),
-        'occupation': faker.job(),
-        'salary': random.randint(850, 3500)
-    }
-    data.append(row)
-
-# Save to CSV using csv module
-with open('user_data.csv', 'w', newline='', encoding='utf-8') as csvfile:
-    fieldnames = ['id', 'first_name', 'last_name', 'city', 'occupation', 'salary']
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(data)
-
-print(f"Generated {num_rows} rows of user data and saved to user_data.csv")
-print("Sample rows:")
-for row in data[:5]:
-    print(row)
\ No newline at end of file
+from synthetic_users import SCHEMAS, generate_users
+
+def generate_with_faker(num_rows, output_file):
+    """
+    Original generator: one Faker call per field per row, all rows kept in memory.
+    """
+    # Initialize Faker
+    faker = Faker()
+
+    # Generate data
+    data = []
+    for i in range(1, num_rows + 1):
+        row = {
+            'id': i,
+            'first_name': faker.first_name(),
+            'last_name': faker.last_name(),
+            'city': faker.city(),
+            'occupation': faker.job(),
+            'salary': random.randint(850, 3500)
+        }
+        data.append(row)
+
+    # Save to CSV using csv module
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        fieldnames = ['id', 'first_name', 'last_name', 'city', 'occupation', 'salary']
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(data)
+
+    print(f"Generated {num_rows} rows of user data and saved to {output_file}")
+    print("Sample rows:")
+    for row in data[:5]:
+        print(row)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic user data.")
+    parser.add_argument('--rows', type=int, default=100000, help="number of rows to generate")
+    parser.add_argument('--output', default='user_data.csv',
+                        help="output CSV file (directory for parquet)")
+    parser.add_argument('--fast', action='store_true',
+                        help="bulk mode: Faker vocabularies sampled with numpy, streamed in chunks")
+    parser.add_argument('--workers', type=int, default=1, help="processes (shards) in --fast mode")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help="output format in --fast mode")
+    parser.add_argument('--schema', choices=sorted(SCHEMAS), default='first',
+                        help="columns in --fast mode")
+    parser.add_argument('--seed', type=int, default=0, help="random seed in --fast mode")
+    args = parser.parse_args()
+
+    if not args.fast:
+        generate_with_faker(args.rows, args.output)
+        return
+    files = generate_users(args.output, args.rows, workers=args.workers, fmt=args.format,
+                           seed=args.seed, schema=args.schema)
+    print(f"Generated {args.rows} rows of user data and saved to {', '.join(files)}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,211 @@
+import io
+import json
+import os
+
+import pandas as pd
+
+from data_loading import csv_read_options, split_columns
+from streaming_stats import DEFAULT_CHUNKSIZE, ColumnAccumulator, HyperLogLog, SpaceSaving
+
+STATE_VERSION = 3
+
+
+class _ByteRange(io.RawIOBase):
+    """
+    Read-only view of an open binary file up to a fixed end offset, so a
+    half-written last line of a growing CSV is left for the next run.
+    """
+
+    def __init__(self, f, end):
+        self.f = f
+        self.end = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.end - self.f.tell())
+        if size <= 0:
+            return 0
+        data = self.f.read(size)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def complete_lines_end(f, size):
+    """
+    Return the offset just after the last newline in the first `size` bytes.
+    """
+    position = size
+    while position > 0:
+        start = max(0, position - 65536)
+        f.seek(start)
+        block = f.read(position - start)
+        newline = block.rfind(b'\n')
+        if newline != -1:
+            return start + newline + 1
+        position = start
+    return 0
+
+
+class ReportState:
+    """
+    Mergeable aggregates for the users report plus the position reached in
+    the append-only CSV (byte offset and high-water mark on `id`).
+    Categorical columns keep a bounded Space-Saving summary and a
+    HyperLogLog sketch, so the state does not grow with the row count even
+    for unique columns like email; low-cardinality columns stay exact.
+    """
+
+    def __init__(self, header, numeric_cols, other_cols, offset, exact=False):
+        self.header = header
+        self.numeric_cols = numeric_cols
+        self.other_cols = other_cols
+        self.offset = offset
+        self.exact = exact
+        self.high_water_id = None
+        self.total_records = 0
+        self.numerical = {col: ColumnAccumulator(exact=exact) for col in numeric_cols}
+        self.categorical = {col: SpaceSaving() for col in other_cols}
+        self.distinct = {col: HyperLogLog() for col in other_cols}
+
+    @classmethod
+    def new(cls, csv_path, exact=False):
+        with open(csv_path, 'rb') as f:
+            header_line = f.readline()
+        numeric_cols, other_cols = split_columns(csv_path, csv_read_options(csv_path))
+        return cls(header_line.decode('utf-8').rstrip('\r\n'), numeric_cols, other_cols,
+                   offset=len(header_line), exact=exact)
+
+    @classmethod
+    def load(cls, state_file):
+        with open(state_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != STATE_VERSION:
+            return None
+        state = cls(data['header'], data['numeric_cols'], data['other_cols'], data['offset'],
+                    exact=data['exact'])
+        state.high_water_id = data['high_water_id']
+        state.total_records = data['total_records']
+        state.numerical = {
+            col: ColumnAccumulator.from_state(acc) for col, acc in data['numerical'].items()
+        }
+        state.categorical = {
+            col: SpaceSaving.from_state(summary) for col, summary in data['categorical'].items()
+        }
+        state.distinct = {
+            col: HyperLogLog.from_state(sketch) for col, sketch in data['distinct'].items()
+        }
+        return state
+
+    def save(self, state_file):
+        data = {
+            'version': STATE_VERSION,
+            'header': self.header,
+            'numeric_cols': self.numeric_cols,
+            'other_cols': self.other_cols,
+            'offset': self.offset,
+            'exact': self.exact,
+            'high_water_id': self.high_water_id,
+            'total_records': self.total_records,
+            'numerical': {col: acc.to_state() for col, acc in self.numerical.items()},
+            'categorical': {col: summary.to_state() for col, summary in self.categorical.items()},
+            'distinct': {col: sketch.to_state() for col, sketch in self.distinct.items()}
+        }
+        tmp_file = state_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, state_file)
+
+    def matches(self, csv_path, exact=False):
+        """
+        The state can be reused while the CSV still has the same header, has
+        not shrunk below the offset already processed and was built in the
+        same (exact or sketch) mode.
+        """
+        if self.exact != exact or os.path.getsize(csv_path) < self.offset:
+            return False
+        with open(csv_path, 'rb') as f:
+            return f.readline().decode('utf-8').rstrip('\r\n') == self.header
+
+    def update(self, chunk):
+        """
+        Merge one chunk of new rows. Rows with missing categorical values are
+        dropped like in load_data, but numerical gaps are filled with the
+        running median at the time the chunk arrives, not the median of the
+        whole file, so the filled values (and the statistics that include
+        them) are an approximation that depends on row order and chunking.
+        """
+        if 'id' in chunk.columns and self.high_water_id is not None:
+            chunk = chunk[chunk['id'] > self.high_water_id]
+        chunk = chunk.dropna(subset=self.other_cols)
+        if chunk.empty:
+            return
+        for col in self.numeric_cols:
+            acc = self.numerical[col]
+            acc.update(chunk[col])
+            missing = int(chunk[col].isna().sum())
+            if missing and acc.moments.count:
+                acc.add_constant(acc.quantile(0.5), missing)
+        for col in self.other_cols:
+            # Values are kept as strings so the summaries round-trip through JSON
+            values = chunk[col].astype(str)
+            self.categorical[col].update(values)
+            self.distinct[col].update(values)
+        if 'id' in chunk.columns:
+            top_id = int(chunk['id'].max())
+            if self.high_water_id is None or top_id > self.high_water_id:
+                self.high_water_id = top_id
+        self.total_records += len(chunk)
+
+    def num_stats(self):
+        return {col: acc.to_dict() for col, acc in self.numerical.items()}
+
+    def cat_stats(self, top_k=5):
+        cat_stats = {}
+        for col, summary in self.categorical.items():
+            top_values = summary.top(top_k)
+            percentages = (top_values / self.total_records * 100).round(2)
+            cat_stats[col] = pd.DataFrame({'Count': top_values, 'Percentage': percentages})
+            if summary.saturated:
+                cat_stats[col].attrs['Distinct Values (estimated)'] = self.distinct[col].estimate()
+                cat_stats[col].attrs['Max Count Error'] = summary.max_error
+        return cat_stats
+
+
+def ingest_new_rows(csv_path, state, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Parse only the bytes appended since the last run and merge them into
+    the state. Returns the number of new rows read.
+    """
+    options = csv_read_options(csv_path)
+    names = pd.read_csv(csv_path, nrows=0).columns
+    new_rows = 0
+    with open(csv_path, 'rb') as f:
+        end = complete_lines_end(f, os.path.getsize(csv_path))
+        if end <= state.offset:
+            return 0
+        f.seek(state.offset)
+        reader = io.BufferedReader(_ByteRange(f, end))
+        for chunk in pd.read_csv(reader, header=None, names=names,
+                                 chunksize=chunksize, **options):
+            state.update(chunk)
+            new_rows += len(chunk)
+    state.offset = end
+    return new_rows
+
+
+def incremental_analysis(csv_path, state_file, chunksize=DEFAULT_CHUNKSIZE, exact=False):
+    """
+    Load (or start) the persisted state, merge the newly appended rows and
+    save it again. Returns the updated ReportState.
+    """
+    state = None
+    if os.path.exists(state_file):
+        state = ReportState.load(state_file)
+    if state is None or not state.matches(csv_path, exact):
+        state = ReportState.new(csv_path, exact=exact)
+    new_rows = ingest_new_rows(csv_path, state, chunksize)
+    state.save(state_file)
+    print(f"Incremental update: {new_rows} new rows, {state.total_records} in total.")
+    return state
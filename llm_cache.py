@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.getenv("LLM_CACHE_PATH", '.llm_cache.sqlite')
+# Answers older than this are asked again (the model behind a name can change)
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+# Least recently used answers are dropped once the stored text exceeds this
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+INDEX_DDL = "CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)"
+
+# One cache per database file for the lifetime of the process
+_caches = {}
+
+
+def normalize_prompt(prompt):
+    """
+    Make prompts that differ only in indentation or blank lines
+    (f-strings inside functions) produce the same key.
+    """
+    lines = (re.sub(r'\s+', ' ', line).strip() for line in prompt.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def cache_key(provider, model, prompt, params=None):
+    payload = json.dumps([provider, model, normalize_prompt(prompt), params or {}],
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent content-addressed store of model answers in SQLite, keyed on
+    (provider, model, normalized prompt, parameters).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute(SCHEMA)
+        self.connection.execute(INDEX_DDL)
+
+    def get(self, key):
+        row = self.connection.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        response, created_at = row
+        now = time.time()
+        if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        self.connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return response
+
+    def set(self, key, provider, model, response):
+        now = time.time()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, provider, model, response, len(response.encode('utf-8')), now, now))
+        self.evict()
+
+    def evict(self):
+        """
+        Drop expired answers, then the least recently used ones until the
+        stored text fits into max_bytes.
+        """
+        if self.ttl_seconds is not None:
+            self.connection.execute("DELETE FROM responses WHERE created_at < ?",
+                                    (time.time() - self.ttl_seconds,))
+        if self.max_bytes is None:
+            return
+        (total,) = self.connection.execute("SELECT coalesce(sum(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in self.connection.execute(
+                "SELECT key, size FROM responses ORDER BY last_used"):
+            if freed >= excess:
+                break
+            stale.append((key,))
+            freed += size
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def cached_call(self, provider, model, prompt, call, params=None):
+        """
+        Return the stored answer for the request, or run call() (which must
+        return the answer text) and store it. Exceptions from call() are not
+        cached, so a failed request is tried again next time.
+        """
+        key = cache_key(provider, model, prompt, params)
+        response = self.get(key)
+        if response is None:
+            response = call()
+            self.set(key, provider, model, response)
+        return response
+
+    def close(self):
+        self.connection.close()
+
+
+def get_cache(path=DEFAULT_CACHE_PATH):
+    """
+    Return the shared cache for `path`. LLM_CACHE_DISABLE=1 turns caching off
+    (every call goes to the model).
+    """
+    if os.getenv("LLM_CACHE_DISABLE") == '1':
+        return None
+    cache = _caches.get(path)
+    if cache is None:
+        cache = LLMCache(path)
+        _caches[path] = cache
+    return cache
+
+
+def cached_completion(provider, model, prompt, call, params=None):
+    """
+    cached_call() on the shared cache, or a plain call() when caching is off.
+    """
+    cache = get_cache()
+    if cache is None:
+        return call()
+    return cache.cached_call(provider, model, prompt, call, params)
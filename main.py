@@ -1,23 +1,55 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
+
+from title_fetcher import DEFAULT_MAX_CONNECTIONS, DEFAULT_PER_HOST, DEFAULT_TIMEOUT, fetch_titles
 
 # Fetch the title of example.com
 url = "https://example.com"
 
-try:
-    # Send GET request
-    response = requests.get(url)
-    response.raise_for_status()  # Raise exception for bad status codes
-    
-    # Parse HTML content
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    # Extract title
-    title = soup.title.string if soup.title else "No title found"
-    
-    print(f"Website: {url}")
-    print(f"Title: {title}")
-    
-except requests.exceptions.RequestException as e:
-    print(f"Error fetching website: {e}")
 
+def read_urls(path):
+    """
+    One URL per line; empty lines and # comments are skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch web page titles.")
+    parser.add_argument('urls', nargs='*', help=f"URLs to fetch (default: {url})")
+    parser.add_argument('--urls-file', default=None, help="file with one URL per line")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_MAX_CONNECTIONS,
+                        help="maximum open connections")
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST,
+                        help="maximum parallel requests to one host")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument('--output', default=None, help="write url<TAB>title lines to this file")
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.urls_file:
+        urls.extend(read_urls(args.urls_file))
+    if not urls:
+        urls = [url]
+
+    results = fetch_titles(urls, args.concurrency, args.per_host, args.timeout)
+
+    if args.output:
+        failed = 0
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for page_url, title, error in results:
+                failed += error is not None
+                f.write(f"{page_url}\t{title or ''}\t{error or ''}\n")
+        print(f"Fetched {len(results) - failed} of {len(results)} titles into {args.output}")
+        return
+
+    for page_url, title, error in results:
+        print(f"Website: {page_url}")
+        if error:
+            print(f"Error fetching website: {error}")
+        else:
+            print(f"Title: {title or 'No title found'}")
+
+
+if __name__ == "__main__":
+    main()
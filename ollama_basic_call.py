@@ -1,27 +1,17 @@
-import requests
 import json
 
-#simple example
-response = requests.post(
-    "http://localhost:11434/api/generate",
-    json={"model": "tinyllama", "prompt": "Hello there!"}
-)
+from ollama_client import OllamaClient, StreamMetrics
 
-for line in response.iter_lines():
-    if line:
-        print(line.decode("utf-8"))
+# One session for all calls; the model stays loaded between them
+client = OllamaClient(model="tinyllama")
+client.preload()
 
-#complex example
-response = requests.post(
-    "http://localhost:11434/api/generate",
-    json={
-        "model": "tinyllama",
-        "prompt": "What is the capital of France?",
-        "stream": False
-    }
-)
+#simple example
+for chunk in client.stream_generate("Hello there!"):
+    print(json.dumps(chunk.data))
 
-data = response.json()
+#complex example
+data = client.generate("What is the capital of France?")
 print(data["response"])
 
 #streaming example
@@ -30,19 +20,14 @@ messages = [
     {"role": "user", "content": "What is the capital of France? Answer in one sentence."}
 ]
 
-response = requests.post(
-    "http://localhost:11434/api/chat",
-    json={
-        "model": "tinyllama",
-        "messages": messages,
-        "stream": True
-    },
-    stream=True
-)
+metrics = StreamMetrics()
+for chunk in client.stream_chat(messages, metrics=metrics):
+    print(chunk.content, end="", flush=True)
+print()  # New line at the end
+# Either value is None when the stream had no tokens or Ollama left out the timings
+ttft = metrics.time_to_first_token
+rate = metrics.tokens_per_second
+print(f"Time to first token: {f'{ttft:.3f} s' if ttft is not None else 'n/a'}, "
+      f"{f'{rate:.1f}' if rate is not None else 'n/a'} tokens/s, eval_count: {metrics.eval_count}")
 
-for line in response.iter_lines():
-    if line:
-        data = json.loads(line)
-        if "message" in data and "content" in data["message"]:
-            print(data["message"]["content"], end="", flush=True)
-print()  # New line at the end
\ No newline at end of file
+client.close()
@@ -0,0 +1,253 @@
+import json
+import time
+from collections import namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HOST = "http://localhost:11434"
+# How long Ollama keeps the model in memory after a request ('-1' = forever)
+DEFAULT_KEEP_ALIVE = '30m'
+DEFAULT_TIMEOUT = 300
+POOL_SIZE = 10
+
+# One piece of a streamed answer; `data` is the whole decoded NDJSON object
+StreamChunk = namedtuple('StreamChunk', ['content', 'done', 'data'])
+
+
+class StreamMetrics:
+    """
+    Latency numbers of one streamed request. Times are time.perf_counter()
+    seconds; eval_duration and the other *_duration fields are Ollama's
+    nanoseconds from the final chunk.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.finished = None
+        self.chunks = 0
+        self.eval_count = None
+        self.eval_duration = None
+        self.prompt_eval_count = None
+        self.prompt_eval_duration = None
+        self.load_duration = None
+
+    def record(self, chunk):
+        now = time.perf_counter()
+        if chunk.content:
+            self.chunks += 1
+            if self.first_token is None:
+                self.first_token = now
+        if chunk.done:
+            self.finished = now
+            for field in ('eval_count', 'eval_duration', 'prompt_eval_count',
+                          'prompt_eval_duration', 'load_duration'):
+                setattr(self, field, chunk.data.get(field))
+
+    @property
+    def time_to_first_token(self):
+        return self.first_token - self.started if self.first_token is not None else None
+
+    @property
+    def tokens_per_second(self):
+        """
+        Ollama's own eval rate when reported, otherwise chunks per second
+        of wall time after the first token.
+        """
+        if self.eval_count and self.eval_duration:
+            return self.eval_count / (self.eval_duration / 1e9)
+        if self.first_token is not None and self.finished is not None and self.finished > self.first_token:
+            return self.chunks / (self.finished - self.first_token)
+        return None
+
+    def to_dict(self):
+        return {
+            'time_to_first_token': self.time_to_first_token,
+            'tokens_per_second': self.tokens_per_second,
+            'total_time': self.finished - self.started if self.finished is not None else None,
+            'chunks': self.chunks,
+            'eval_count': self.eval_count,
+            'eval_duration': self.eval_duration,
+            'prompt_eval_count': self.prompt_eval_count,
+            'prompt_eval_duration': self.prompt_eval_duration,
+            'load_duration': self.load_duration
+        }
+
+
+class LineSplitter:
+    """
+    Split arbitrary byte blocks into complete lines. Blocks are appended to
+    one bytearray and only the unconsumed tail is kept between calls.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, block):
+        self.buffer += block
+        start = 0
+        while True:
+            end = self.buffer.find(b'\n', start)
+            if end == -1:
+                break
+            if end > start:
+                yield bytes(self.buffer[start:end])
+            start = end + 1
+        del self.buffer[:start]
+
+    def flush(self):
+        if self.buffer.strip():
+            yield bytes(self.buffer)
+        self.buffer.clear()
+
+
+def to_chunk(line):
+    data = json.loads(line)
+    if 'error' in data:
+        raise RuntimeError(f"Ollama error: {data['error']}")
+    # /api/chat puts the text under message.content, /api/generate under response
+    content = data.get('message', {}).get('content') or data.get('response', '')
+    return StreamChunk(content, data.get('done', False), data)
+
+
+def parse_stream(blocks, metrics=None):
+    """
+    Yield StreamChunks from an iterable of raw NDJSON byte blocks as soon
+    as each line is complete, recording timings into `metrics`.
+    """
+    splitter = LineSplitter()
+    for block in blocks:
+        for line in splitter.feed(block):
+            chunk = to_chunk(line)
+            if metrics is not None:
+                metrics.record(chunk)
+            yield chunk
+    for line in splitter.flush():
+        chunk = to_chunk(line)
+        if metrics is not None:
+            metrics.record(chunk)
+        yield chunk
+
+
+async def aparse_stream(blocks, metrics=None):
+    """
+    Async variant of parse_stream for an async iterable of byte blocks
+    (e.g. httpx's response.aiter_bytes()).
+    """
+    splitter = LineSplitter()
+    async for block in blocks:
+        for line in splitter.feed(block):
+            chunk = to_chunk(line)
+            if metrics is not None:
+                metrics.record(chunk)
+            yield chunk
+    for line in splitter.flush():
+        chunk = to_chunk(line)
+        if metrics is not None:
+            metrics.record(chunk)
+        yield chunk
+
+
+async def astream_chat(http_client, messages, model, host=DEFAULT_HOST,
+                       keep_alive=DEFAULT_KEEP_ALIVE, metrics=None, **options):
+    """
+    Stream /api/chat through an httpx.AsyncClient, yielding StreamChunks.
+    """
+    body = {'model': model, 'messages': messages, 'stream': True, 'keep_alive': keep_alive}
+    if options:
+        body['options'] = options
+    if metrics is not None:
+        metrics.started = time.perf_counter()
+    async with http_client.stream('POST', host.rstrip('/') + '/api/chat', json=body) as response:
+        response.raise_for_status()
+        # aiter_bytes, not aiter_raw: the body may be gzip-encoded
+        async for chunk in aparse_stream(response.aiter_bytes(), metrics):
+            yield chunk
+
+
+class OllamaClient:
+    """
+    Ollama REST client over one requests.Session, so TCP connections are
+    reused between calls. Every request sends `keep_alive`, which keeps the
+    model loaded between prompts; preload() loads it before the first one.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, model=None, keep_alive=DEFAULT_KEEP_ALIVE,
+                 timeout=DEFAULT_TIMEOUT, pool_size=POOL_SIZE):
+        self.host = host.rstrip('/')
+        self.model = model
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def _post(self, path, body, stream=False):
+        body.setdefault('model', self.model)
+        body.setdefault('keep_alive', self.keep_alive)
+        response = self.session.post(self.host + path, json=body, stream=stream,
+                                     timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def preload(self, model=None):
+        """
+        Load the model into memory without generating anything.
+        """
+        self._post('/api/generate', {'model': model or self.model})
+
+    def unload(self, model=None):
+        self._post('/api/generate', {'model': model or self.model, 'keep_alive': 0})
+
+    def generate(self, prompt, model=None, **options):
+        """
+        Non-streaming /api/generate; returns the whole response dict.
+        """
+        body = {'model': model or self.model, 'prompt': prompt, 'stream': False}
+        if options:
+            body['options'] = options
+        return self._post('/api/generate', body).json()
+
+    def chat(self, messages, model=None, **options):
+        """
+        Non-streaming /api/chat; returns the whole response dict.
+        """
+        body = {'model': model or self.model, 'messages': messages, 'stream': False}
+        if options:
+            body['options'] = options
+        return self._post('/api/chat', body).json()
+
+    def stream(self, path, body, metrics=None):
+        """
+        Yield StreamChunks of a streaming request as the bytes arrive.
+        Pass a StreamMetrics to get time to first token and tokens/sec.
+        """
+        body['stream'] = True
+        if metrics is not None:
+            metrics.started = time.perf_counter()
+        with self._post(path, body, stream=True) as response:
+            # chunk_size=None hands over each HTTP chunk as soon as it is received
+            yield from parse_stream(response.iter_content(chunk_size=None), metrics)
+
+    def stream_generate(self, prompt, model=None, metrics=None, **options):
+        body = {'model': model or self.model, 'prompt': prompt}
+        if options:
+            body['options'] = options
+        return self.stream('/api/generate', body, metrics)
+
+    def stream_chat(self, messages, model=None, metrics=None, **options):
+        body = {'model': model or self.model, 'messages': messages}
+        if options:
+            body['options'] = options
+        return self.stream('/api/chat', body, metrics)
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+
+from llm_cache import DEFAULT_CACHE_PATH
+
+# Generated code is re-created after this even if it keeps working
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generated_code (
+    key TEXT PRIMARY KEY,
+    schema_fingerprint TEXT NOT NULL,
+    question TEXT NOT NULL,
+    code TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+)
+"""
+INDEX_DDL = "CREATE INDEX IF NOT EXISTS idx_generated_code_last_used ON generated_code(last_used)"
+
+
+def schema_fingerprint(df):
+    """
+    Hash of the column names and dtypes; refreshed data with the same
+    columns gets the same fingerprint.
+    """
+    schema = [[str(col), str(dtype)] for col, dtype in df.dtypes.items()]
+    return hashlib.sha256(json.dumps(schema).encode('utf-8')).hexdigest()
+
+
+def normalize_question(question):
+    return re.sub(r'\s+', ' ', question).strip().rstrip('?.!').strip().lower()
+
+
+def is_valid_code(code):
+    """
+    Only non-empty code that compiles is stored.
+    """
+    if not code or not code.strip():
+        return False
+    try:
+        compile(code, '<pandasai>', 'exec')
+    except SyntaxError:
+        return False
+    return True
+
+
+def run_code(agent, df, code):
+    """
+    Execute cached code through the agent's own executor (same environment
+    as the code the LLM generated); without one, run it with `dfs` and read
+    `result`. Returns the result value.
+    """
+    if hasattr(agent, 'execute_code'):
+        result = agent.execute_code(code)
+    else:
+        namespace = {'dfs': [df]}
+        exec(compile(code, '<pandasai>', 'exec'), namespace)
+        result = namespace.get('result')
+    if isinstance(result, dict) and 'value' in result:
+        return result['value']
+    if result is None:
+        raise ValueError("Cached code returned no result.")
+    return result
+
+
+class CodeCache:
+    """
+    Stores the pandas code PandasAI generated for a question, keyed on the
+    DataFrame's schema fingerprint and the normalized question, so the same
+    question over refreshed data runs the code without asking the model.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute(SCHEMA)
+        self.connection.execute(INDEX_DDL)
+
+    @staticmethod
+    def key(fingerprint, question):
+        payload = fingerprint + '\n' + normalize_question(question)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        row = self.connection.execute(
+            "SELECT code, created_at FROM generated_code WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        code, created_at = row
+        if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+            self.delete(key)
+            return None
+        return code
+
+    def set(self, key, fingerprint, question, code):
+        now = time.time()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO generated_code "
+            "(key, schema_fingerprint, question, code, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, fingerprint, normalize_question(question), code, now, now))
+        self.evict()
+
+    def touch(self, key):
+        self.connection.execute(
+            "UPDATE generated_code SET last_used = ?, hits = hits + 1 WHERE key = ?",
+            (time.time(), key))
+
+    def delete(self, key):
+        self.connection.execute("DELETE FROM generated_code WHERE key = ?", (key,))
+
+    def evict(self):
+        """
+        Drop expired entries, then the least recently used ones above max_entries.
+        """
+        if self.ttl_seconds is not None:
+            self.connection.execute("DELETE FROM generated_code WHERE created_at < ?",
+                                    (time.time() - self.ttl_seconds,))
+        if self.max_entries is not None:
+            self.connection.execute(
+                "DELETE FROM generated_code WHERE key IN (SELECT key FROM generated_code "
+                "ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def chat(self, agent, df, question, prompt=None):
+        """
+        Run the cached code for (schema of df, question) if there is any;
+        when there is none, or the cached code raises, ask agent.chat and
+        store the code it executed. `prompt` is what the agent is asked
+        (default: the question); only the stable question is part of the
+        key, so a prompt carrying data (e.g. a statistics digest) still hits.
+        """
+        fingerprint = schema_fingerprint(df)
+        key = self.key(fingerprint, question)
+        code = self.get(key)
+        if code is not None:
+            try:
+                result = run_code(agent, df, code)
+                self.touch(key)
+                self.hits += 1
+                return result
+            except Exception as e:
+                print(f"Cached code failed, asking the LLM again: {e}")
+                self.delete(key)
+        self.misses += 1
+        response = agent.chat(prompt or question)
+        code = getattr(response, 'last_code_executed', None)
+        if type(response).__name__ != 'ErrorResponse' and is_valid_code(code):
+            self.set(key, fingerprint, question, code)
+        return response
+
+    def close(self):
+        self.connection.close()
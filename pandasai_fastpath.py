@@ -0,0 +1,185 @@
+import re
+
+AGGREGATE_WORDS = {
+    'average': 'mean', 'avg': 'mean', 'mean': 'mean',
+    'median': 'median',
+    'sum': 'sum', 'total': 'sum',
+    'count': 'count', 'number': 'count', 'many': 'count',
+    'min': 'min', 'minimum': 'min', 'lowest': 'min', 'smallest': 'min',
+    'max': 'max', 'maximum': 'max', 'highest': 'max', 'largest': 'max', 'biggest': 'max',
+    'distinct': 'nunique', 'unique': 'nunique', 'different': 'nunique'
+}
+TOP_WORDS = {'top', 'most', 'common', 'frequent', 'popular'}
+GROUP_WORDS = {'by', 'per', 'each', 'every', 'grouped', 'group', 'across'}
+# Words that carry no meaning for the aggregate; any other word sends the
+# question to the LLM (it may be a filter or a condition we do not parse)
+FILLER_WORDS = {
+    'what', 'whats', 'is', 'are', 'was', 'the', 'a', 'an', 'of', 'for', 'show', 'me',
+    'give', 'tell', 'list', 'get', 'compute', 'calculate', 'find', 'how', 'value',
+    'values', 'in', 'our', 'all', 'there', 'do', 'we', 'have', 'and', 'please', 'which'
+}
+
+
+def tokenize(question):
+    return re.findall(r"[a-z0-9_]+", question.lower().replace("'", ''))
+
+
+def singular(word):
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith('ses') or word.endswith('xes'):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+class FastPathResolver:
+    """
+    Answers simple aggregate questions (average/sum/count/min/max/median of
+    a column, top-N, optionally grouped by a categorical column) directly
+    with pandas. Anything it does not fully understand returns None and
+    goes to the LLM. hits/misses count how often the fast path was used.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.hits = 0
+        self.misses = 0
+        # Both 'first name' and 'first_name' point at first_name
+        self.column_words = {}
+        for col in df.columns:
+            name = str(col).lower()
+            self.column_words.setdefault(name, col)
+            self.column_words.setdefault(name.replace('_', ' '), col)
+        self.numeric = set(df.select_dtypes(include=['number']).columns)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _match_columns(self, words):
+        """
+        Replace column names (also multi-word and plural) by ('col', name)
+        items; other words stay as they are.
+        """
+        items = []
+        i = 0
+        while i < len(words):
+            for length in (3, 2, 1):
+                phrase = ' '.join(words[i:i + length])
+                candidates = [phrase, ' '.join(singular(w) for w in words[i:i + length])]
+                col = next((self.column_words[c] for c in candidates if c in self.column_words), None)
+                if col is not None and i + length <= len(words):
+                    items.append(('col', col))
+                    i += length
+                    break
+            else:
+                items.append(words[i])
+                i += 1
+        return items
+
+    def parse(self, question):
+        """
+        Return (kind, value_column, group_column, top_n, aggregate) or None;
+        kind is the aggregate name or 'top'.
+        """
+        items = self._match_columns(tokenize(question))
+        aggregate = None
+        top_n = None
+        is_top = False
+        columns = []
+        group = None
+        expect_group = False
+        for item in items:
+            if isinstance(item, tuple):
+                if expect_group:
+                    if group is not None:
+                        return None
+                    group = item[1]
+                    expect_group = False
+                else:
+                    columns.append(item[1])
+            elif item in GROUP_WORDS:
+                expect_group = True
+            elif item in TOP_WORDS:
+                is_top = True
+            elif item.isdigit() and is_top and top_n is None:
+                top_n = int(item)
+            elif item in AGGREGATE_WORDS:
+                if aggregate is not None and aggregate != AGGREGATE_WORDS[item]:
+                    # "number of distinct ..." -> nunique
+                    if {aggregate, AGGREGATE_WORDS[item]} != {'count', 'nunique'}:
+                        return None
+                    aggregate = 'nunique'
+                else:
+                    aggregate = AGGREGATE_WORDS[item]
+            elif item not in FILLER_WORDS:
+                return None
+        if expect_group or len(columns) > 1:
+            return None
+        value = columns[0] if columns else None
+        if is_top:
+            return ('top', value, group, top_n or 5, aggregate)
+        if aggregate is None:
+            return None
+        if aggregate in ('mean', 'median', 'sum', 'min', 'max') and value not in self.numeric:
+            return None
+        if aggregate == 'count' and value is not None and value not in self.numeric:
+            # "how many occupations" asks for the distinct values, not the filled rows
+            aggregate = 'nunique'
+        if group is not None and group in self.numeric:
+            return None
+        return (aggregate, value, group, None, None)
+
+    def compute(self, parsed):
+        kind, value, group, top_n, aggregate = parsed
+        df = self.df
+        if kind == 'top':
+            if group is None:
+                # "top 5 occupations" -> most frequent values
+                if value is None or value in self.numeric:
+                    return None
+                return df[value].value_counts().head(top_n)
+            if group not in self.numeric or value is None:
+                return None
+            if aggregate in ('mean', 'median', 'sum', 'min', 'max', 'count'):
+                # "top 3 departments by average salary"
+                if value in self.numeric:
+                    return None
+                grouped = df.groupby(value, observed=True)[group].agg(aggregate)
+                return grouped.nlargest(top_n)
+            if aggregate is not None:
+                return None
+            # "top 3 employees by salary" -> rows with the largest salary
+            return df.nlargest(top_n, group)[[value, group]].reset_index(drop=True)
+        if kind == 'count' and value is None:
+            return len(df) if group is None else df.groupby(group, observed=True).size()
+        if value is None:
+            return None
+        if group is None:
+            result = getattr(df[value], kind)()
+            return result.item() if hasattr(result, 'item') else result
+        return getattr(df.groupby(group, observed=True)[value], kind)()
+
+    def resolve(self, question):
+        """
+        Answer the question locally, or return None (counted as a miss).
+        """
+        parsed = self.parse(question)
+        result = self.compute(parsed) if parsed is not None else None
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def ask(self, agent, question):
+        """
+        Local answer when the question is simple, agent.chat otherwise.
+        """
+        result = self.resolve(question)
+        if result is None:
+            return agent.chat(question)
+        return result
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    # Without pyarrow the columns are analysed sequentially in this process
+    feather = None
+
+SHARED_FILE_NAME = 'frame.arrow'
+
+
+def shared_memory_dir():
+    """
+    Prefer /dev/shm so the shared Arrow file never touches the disk.
+    """
+    return '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+def _analyze_column(task):
+    """
+    Worker: memory-map only the needed column from the shared Arrow file
+    and run the analysis function on it.
+    """
+    path, analysis_fn, col = task
+    table = feather.read_table(path, columns=[col], memory_map=True)
+    return analysis_fn(table.to_pandas(), col)
+
+
+def analyze_columns(df, tasks, workers):
+    """
+    Run (analysis_fn, column) tasks over a process pool and return the
+    results in task order. The frame is written once as an uncompressed
+    Arrow file that every worker memory-maps, instead of being pickled
+    to each of them. analysis_fn must be a module-level function.
+    """
+    if workers <= 1 or feather is None or len(tasks) <= 1:
+        return [analysis_fn(df, col) for analysis_fn, col in tasks]
+    columns = sorted({col for _, col in tasks}, key=list(df.columns).index)
+    with tempfile.TemporaryDirectory(dir=shared_memory_dir()) as tmp_dir:
+        path = os.path.join(tmp_dir, SHARED_FILE_NAME)
+        feather.write_feather(df[columns].reset_index(drop=True), path,
+                              compression='uncompressed')
+        jobs = [(path, analysis_fn, col) for analysis_fn, col in tasks]
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            return list(executor.map(_analyze_column, jobs))
@@ -0,0 +1,84 @@
+import pandas as pd
+from psycopg import sql
+from psycopg.types.numeric import FloatLoader
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Parquet output needs pyarrow; DataFrame chunks and COPY work without it
+    pa = None
+
+# Rows the server-side cursor sends per network round trip
+DEFAULT_ITERSIZE = 50000
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def use_float_numerics(cursor):
+    """
+    Load NUMERIC columns (salary) as float instead of Decimal objects.
+    Registered on the cursor only, so a pooled connection keeps returning
+    Decimal to its other users.
+    """
+    cursor.adapters.register_loader("numeric", FloatLoader)
+
+
+def iter_user_frames(connection, query="SELECT * FROM users", params=None,
+                     itersize=DEFAULT_ITERSIZE):
+    """
+    Run the query through a named (server-side) cursor and yield one
+    DataFrame per `itersize` rows. Only one chunk is held in memory.
+    """
+    with connection.cursor(name='users_stream') as cursor:
+        use_float_numerics(cursor)
+        cursor.itersize = itersize
+        cursor.execute(query, params)
+        columns = None
+        while True:
+            rows = cursor.fetchmany(itersize)
+            if not rows:
+                break
+            if columns is None:
+                columns = [desc.name for desc in cursor.description]
+            yield pd.DataFrame.from_records(rows, columns=columns)
+
+
+def write_frames_parquet(frames, output_file):
+    """
+    Append DataFrame chunks to one Parquet file. Returns the number of rows.
+    """
+    if pa is None:
+        raise RuntimeError("Parquet output requires pyarrow.")
+    writer = None
+    total = 0
+    try:
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False,
+                                         schema=writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(output_file, table.schema)
+            writer.write_table(table)
+            total += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def copy_users_to_csv(connection, output_file, query=None, params=None, table='users'):
+    """
+    Export with COPY ... TO STDOUT; the server formats the CSV and the bytes
+    are written to the file as they arrive. Without `query` the whole table
+    is copied, otherwise the result of the SELECT (COPY (query) TO STDOUT).
+    COPY takes no server-side parameters, so psycopg binds `params` client-side.
+    """
+    if query is None:
+        source = sql.Identifier(table)
+    else:
+        source = sql.SQL("({})").format(query)
+    with connection.cursor() as cursor:
+        with open(output_file, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            copy_query = sql.SQL("COPY {} TO STDOUT (FORMAT CSV, HEADER)").format(source)
+            with cursor.copy(copy_query, params) as copy:
+                for data in copy:
+                    f.write(data)
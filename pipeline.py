@@ -0,0 +1,208 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from data_loading import file_sha256
+from profiling import profiler
+
+DEFAULT_CACHE_DIR = '.pipeline_cache'
+DEFAULT_WORKERS = 4
+
+
+class PipelineError(Exception):
+    pass
+
+
+class FileInput:
+    """
+    A source file; its hash is the hash of the file's content.
+    """
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.inputs = ()
+        self.cache = False
+
+    def fingerprint(self, input_hashes):
+        if not os.path.exists(self.path):
+            raise PipelineError(f"Input file '{self.path}' of stage '{self.name}' does not exist.")
+        return file_sha256(self.path)
+
+    def run(self, values):
+        return self.path
+
+
+def source_of(obj):
+    """
+    Source code of a function or module; its qualified name when the source
+    is not available (builtins, compiled extensions).
+    """
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', obj.__name__)}"
+
+
+class Stage:
+    """
+    One step of the pipeline: func(*values of inputs, **params).
+    The stage hash covers the function's source code, params, `version` and
+    the hashes of its inputs, so it only changes when something the stage
+    depends on changes. Code the function calls is not covered: list those
+    functions or whole modules in `depends`, so their source is hashed too
+    (or bump `version` when they change). `outputs` are files the stage writes; a cached
+    result is only reused while they all exist. cache=False stages (e.g. a
+    large DataFrame) are not stored and only run when a later stage needs
+    their value. cache_when(value) can refuse to store a result (e.g. an
+    error message instead of an answer), so the stage runs again next time.
+    """
+
+    def __init__(self, name, func, inputs=(), params=None, outputs=(), cache=True, version=None,
+                 cache_when=None, depends=()):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = params or {}
+        self.outputs = tuple(outputs)
+        self.cache = cache
+        self.version = version
+        self.cache_when = cache_when
+        self.depends = tuple(depends)
+
+    def fingerprint(self, input_hashes):
+        code = [source_of(obj) for obj in (self.func,) + self.depends]
+        payload = json.dumps([self.name, code, self.params, self.version, input_hashes],
+                             sort_keys=True, ensure_ascii=False, default=repr)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def run(self, values):
+        return self.func(*values, **self.params)
+
+
+class Pipeline:
+    """
+    Runs a DAG of stages. Stages whose hash has not changed are loaded from
+    the cache directory instead of being run, and stages whose inputs are
+    ready run concurrently in a thread pool.
+    """
+
+    def __init__(self, stages, cache_dir=DEFAULT_CACHE_DIR, workers=DEFAULT_WORKERS,
+                 use_cache=True):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.workers = workers
+        for stage in stages:
+            for name in stage.inputs:
+                if name not in self.stages:
+                    raise PipelineError(f"Stage '{stage.name}' needs unknown stage '{name}'.")
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        order = []
+        state = {}
+
+        def visit(name):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise PipelineError(f"Pipeline has a cycle through stage '{name}'.")
+            state[name] = 'visiting'
+            for dependency in self.stages[name].inputs:
+                visit(dependency)
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def _cache_path(self, name, digest):
+        return os.path.join(self.cache_dir, f"{name}-{digest[:16]}.pkl")
+
+    def _is_fresh(self, name, digest):
+        stage = self.stages[name]
+        return (self.use_cache and stage.cache and os.path.exists(self._cache_path(name, digest))
+                and all(os.path.exists(path) for path in stage.outputs))
+
+    def _load(self, name, digest):
+        with open(self._cache_path(name, digest), 'rb') as f:
+            return pickle.load(f)
+
+    def _store(self, name, digest, value):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(name, digest)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    def run(self, targets=None):
+        """
+        Bring `targets` (default: stages nothing else depends on) up to date
+        and return {stage name: value} of the stages that were needed.
+        """
+        hashes = {}
+        for name in self.order:
+            stage = self.stages[name]
+            hashes[name] = stage.fingerprint([hashes[dep] for dep in stage.inputs])
+
+        if targets is None:
+            used = {dep for stage in self.stages.values() for dep in stage.inputs}
+            targets = [name for name in self.order if name not in used]
+
+        # Walk back from the targets: a fresh stage is only loaded, a stale
+        # one is run and needs the values of all its inputs
+        to_run = set()
+        to_load = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name in to_run or name in to_load:
+                continue
+            if self._is_fresh(name, hashes[name]):
+                to_load.add(name)
+            else:
+                to_run.add(name)
+                pending.extend(self.stages[name].inputs)
+
+        values = {name: self._load(name, hashes[name]) for name in to_load}
+        for name in sorted(to_load):
+            print(f"[pipeline] {name}: cached")
+
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while to_run or running:
+                for name in [n for n in self.order if n in to_run]:
+                    stage = self.stages[name]
+                    if all(dep in values for dep in stage.inputs):
+                        to_run.discard(name)
+                        args = [values[dep] for dep in stage.inputs]
+                        running[executor.submit(self._timed_run, stage, args)] = name
+                if not running:
+                    raise PipelineError(f"Stages cannot run: {', '.join(sorted(to_run))}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    value, seconds = future.result()
+                    if value is None:
+                        raise PipelineError(f"Stage '{name}' returned no result.")
+                    print(f"[pipeline] {name}: ran in {seconds:.2f} s")
+                    stage = self.stages[name]
+                    if stage.cache and (stage.cache_when is None or stage.cache_when(value)):
+                        self._store(name, hashes[name], value)
+                    values[name] = value
+        return values
+
+    @staticmethod
+    def _timed_run(stage, args):
+        start = time.perf_counter()
+        with profiler.span(stage.name) as span:
+            value = stage.run(args)
+            if hasattr(value, 'shape'):
+                span.rows = len(value)
+        return value, time.perf_counter() - start
@@ -0,0 +1,262 @@
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from functools import wraps
+
+from report_rendering import WRITE_BUFFER_SIZE, MarkdownWriter, heading, paragraph, table
+
+DEFAULT_SUMMARY_HEADING = 'Run profile'
+
+
+def max_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+
+class Span:
+    def __init__(self, name, parent, start):
+        self.name = name
+        self.parent = parent
+        self.start = start
+        self.thread = threading.get_ident()
+        # Set when a span on another thread was open at the same time; the
+        # traced peak then covers the whole process, not just this span
+        self.concurrent = False
+        self.wall = None
+        self.cpu = None
+        self.traced_peak = 0
+        self.max_rss_mb = None
+        self.rows = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def add_tokens(self, prompt_tokens=0, completion_tokens=0):
+        self.prompt_tokens += prompt_tokens or 0
+        self.completion_tokens += completion_tokens or 0
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'parent': self.parent,
+            'start': self.start,
+            'wall_s': self.wall,
+            'cpu_s': self.cpu,
+            'traced_peak_mb': self.traced_peak / (1024 * 1024),
+            'traced_peak_process_wide': self.concurrent,
+            'max_rss_mb': self.max_rss_mb,
+            'rows': self.rows,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens
+        }
+
+
+class Profiler:
+    """
+    Records stage spans: wall time, CPU time of the span's thread, peak
+    traced (Python/numpy) memory, process max RSS, rows and LLM tokens.
+    Disabled (the default) span() returns a no-op context and nothing is
+    measured. Work done in child processes is not included in CPU time.
+    tracemalloc has one peak counter per process, so the traced peak of a
+    span that overlapped spans on other threads includes their allocations
+    and is marked process-wide.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self.open_spans = []
+        self.started = None
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+        self.started = time.perf_counter()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def span(self, name, rows=None):
+        """
+        `with profiler.span('load') as span: ...; span.rows = len(df)`.
+        """
+        if not self.enabled:
+            return nullcontext(_NULL_SPAN)
+        return self._span(name, rows)
+
+    def _span(self, name, rows):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span = Span(name, parent.name if parent else None, time.perf_counter() - self.started)
+        span.rows = rows
+        return _SpanContext(self, span, stack, parent)
+
+    def _fold_peak(self):
+        """
+        Credit the peak reached so far to every open span, then restart the
+        counter. Called with the lock held whenever a span starts or ends.
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        for span in self.open_spans:
+            span.traced_peak = max(span.traced_peak, peak)
+        tracemalloc.reset_peak()
+
+    def current(self):
+        stack = self._stack() if self.enabled else None
+        return stack[-1] if stack else _NULL_SPAN
+
+    def record_tokens(self, prompt_tokens=0, completion_tokens=0):
+        """
+        Add LLM token usage to the innermost open span of this thread.
+        """
+        self.current().add_tokens(prompt_tokens, completion_tokens)
+
+    def profiled(self, name=None):
+        """
+        Decorator form of span().
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name or func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def ordered_spans(self):
+        return sorted(self.spans, key=lambda span: span.start)
+
+    def trace(self):
+        return {'spans': [span.to_dict() for span in self.ordered_spans()]}
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.trace(), f, indent=2)
+        return path
+
+    def summary_sections(self, title=DEFAULT_SUMMARY_HEADING):
+        """
+        Report sections (see report_rendering) with one table row per span.
+        """
+        spans = self.ordered_spans()
+        yield heading(title)
+        yield table(
+            ['Stage', 'Wall s', 'CPU s', 'Traced peak MB', 'Max RSS MB', 'Rows', 'LLM tokens'],
+            [
+                ['  ' * _depth(span, spans) + span.name for span in spans],
+                [span.wall for span in spans],
+                [span.cpu for span in spans],
+                [f"{span.traced_peak / (1024 * 1024):.1f}" + ('*' if span.concurrent else '')
+                 for span in spans],
+                [span.max_rss_mb for span in spans],
+                ['' if span.rows is None else span.rows for span in spans],
+                [span.prompt_tokens + span.completion_tokens for span in spans]
+            ],
+            formats=[None, '%.3f', '%.3f', None, '%.0f', None, None]
+        )
+        if any(span.concurrent for span in spans):
+            yield paragraph("\\* Process-wide peak: the stage overlapped stages on other threads.")
+
+    def append_summary(self, markdown_file, title=DEFAULT_SUMMARY_HEADING):
+        """
+        Append the summary table to a Markdown report, replacing the table
+        of an earlier run if the file already ends with one.
+        """
+        marker = f"## {title}\n"
+        with open(markdown_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        if marker in content:
+            content = content[:content.index(marker)]
+        with open(markdown_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(content)
+            writer = MarkdownWriter(f)
+            for section in self.summary_sections(title):
+                writer.write(section)
+        return markdown_file
+
+    def write_outputs(self, markdown_file, title=DEFAULT_SUMMARY_HEADING):
+        """
+        JSON trace next to the report (<report>.profile.json) plus the
+        summary table in the report. Returns the trace path.
+        """
+        trace_file = os.path.splitext(markdown_file)[0] + '.profile.json'
+        self.write_json(trace_file)
+        if os.path.exists(markdown_file):
+            self.append_summary(markdown_file, title)
+        return trace_file
+
+
+def _depth(span, spans):
+    names = {s.name: s.parent for s in spans}
+    depth = 0
+    parent = span.parent
+    while parent is not None and depth < len(spans):
+        depth += 1
+        parent = names.get(parent)
+    return depth
+
+
+class _SpanContext:
+    def __init__(self, profiler, span, stack, parent):
+        self.profiler = profiler
+        self.span = span
+        self.stack = stack
+        self.parent = parent
+
+    def __enter__(self):
+        profiler = self.profiler
+        with profiler.lock:
+            # Open spans keep the peak reached so far; the counter restarts for this span
+            profiler._fold_peak()
+            if any(span.thread != self.span.thread for span in profiler.open_spans):
+                for span in profiler.open_spans:
+                    span.concurrent = True
+                self.span.concurrent = True
+            profiler.open_spans.append(self.span)
+        self.stack.append(self.span)
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        return self.span
+
+    def __exit__(self, *exc_info):
+        span = self.span
+        span.cpu = time.thread_time() - self.cpu_start
+        span.wall = time.perf_counter() - self.wall_start
+        span.max_rss_mb = max_rss_mb()
+        self.stack.pop()
+        if self.parent is not None:
+            self.parent.add_tokens(span.prompt_tokens, span.completion_tokens)
+        with self.profiler.lock:
+            self.profiler._fold_peak()
+            self.profiler.open_spans.remove(span)
+            self.profiler.spans.append(span)
+        return False
+
+
+class _NullSpan:
+    """
+    Stand-in span while profiling is off; attribute writes are ignored.
+    """
+
+    def __setattr__(self, name, value):
+        pass
+
+    def add_tokens(self, prompt_tokens=0, completion_tokens=0):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+# Shared profiler; --profile switches it on
+profiler = Profiler()
@@ -0,0 +1,149 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding('cl100k_base')
+except ImportError:
+    # Without tiktoken the count is estimated from the text length
+    _encoding = None
+
+DEFAULT_MAX_TOKENS = 600
+DEFAULT_TOP_K = 5
+DEFAULT_SAMPLE_ROWS = 8
+SIGNIFICANT_DIGITS = 4
+# Rough characters-per-token ratio of mixed Slovak/English text and numbers
+CHARS_PER_TOKEN = 3.5
+
+
+def count_tokens(text):
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def round_value(value, digits=SIGNIFICANT_DIGITS):
+    """
+    Numbers to `digits` significant digits without a trailing '.0';
+    everything else as str.
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return str(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        if isinstance(value, (float, np.floating)) and not math.isfinite(value):
+            return str(value)
+        if abs(value) >= 10 ** 9:
+            return f"{float(value):.{digits}g}"
+        if float(value).is_integer() or abs(value) >= 10 ** digits:
+            return str(int(round(value)))
+        return f"{float(value):.{digits}g}"
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def numeric_lines(num_stats):
+    """
+    One line per column: "col: stat=value, ...".
+    """
+    return [
+        f"{col}: " + ", ".join(f"{name}={round_value(val)}" for name, val in stats.items())
+        for col, stats in num_stats.items() if stats
+    ]
+
+
+def categorical_lines(cat_stats, top_k):
+    """
+    cat_stats: {col: DataFrame with Count/Percentage indexed by value} as
+    returned by categorical_analysis, or {col: Series of counts}.
+    """
+    lines = []
+    for col, counts in cat_stats.items():
+        if isinstance(counts, pd.DataFrame):
+            counts = counts['Count']
+        top = counts.head(top_k)
+        lines.append(f"{col} top {len(top)}: " +
+                     ", ".join(f"{value} ({round_value(count)})" for value, count in top.items()))
+    return lines
+
+
+def stratified_sample(df, rows, strata_column=None, seed=0):
+    """
+    Up to `rows` rows: one per value of the most frequent strata_column
+    values (so common groups are all represented), or a plain random
+    sample without a strata column.
+    """
+    if df is None or len(df) == 0 or rows <= 0:
+        return df.iloc[:0] if df is not None else None
+    if strata_column is None or strata_column not in df.columns:
+        return df.sample(n=min(rows, len(df)), random_state=seed).sort_index()
+    top = df[strata_column].value_counts().head(rows).index
+    subset = df[df[strata_column].isin(top)]
+    return subset.groupby(strata_column, observed=True).sample(n=1, random_state=seed).sort_index()
+
+
+def _csv_cell(text):
+    if ',' in text or '"' in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def sample_lines(sample):
+    lines = [",".join(str(col) for col in sample.columns)]
+    for row in sample.itertuples(index=False):
+        lines.append(",".join(_csv_cell(round_value(val)) for val in row))
+    return lines
+
+
+def build_digest(num_stats, cat_stats=None, df=None, total_records=None, columns=None,
+                 max_tokens=DEFAULT_MAX_TOKENS, top_k=DEFAULT_TOP_K,
+                 sample_rows=DEFAULT_SAMPLE_ROWS, strata_column=None, seed=0):
+    """
+    Build a compact text summary of the computed statistics for an LLM
+    prompt. Parts are added in order of importance (overview, numerical
+    stats, top-K categories, sample rows) while they fit into max_tokens;
+    the top-K lists and the sample are shortened rather than dropped when
+    possible. Returns (text, token_count).
+    """
+    lines = []
+    used = 0
+
+    def try_add(block):
+        nonlocal used
+        text = "\n".join(block)
+        tokens = count_tokens(text) + 1
+        if used + tokens > max_tokens:
+            return False
+        lines.extend(block)
+        used += tokens
+        return True
+
+    overview = []
+    if total_records is not None:
+        overview.append(f"rows: {total_records}")
+    if columns is not None:
+        overview.append(f"columns: {', '.join(str(col) for col in columns)}")
+    if overview:
+        try_add(overview)
+
+    for line in numeric_lines(num_stats):
+        try_add([line])
+
+    if cat_stats:
+        for col, counts in cat_stats.items():
+            for k in range(top_k, 0, -1):
+                if try_add(categorical_lines({col: counts}, k)):
+                    break
+
+    if df is not None and sample_rows > 0:
+        sample = stratified_sample(df, sample_rows, strata_column, seed)
+        body = sample_lines(sample)
+        # Drop rows from the end until the sample fits (header + at least one row)
+        for end in range(len(body), 1, -1):
+            if try_add(["sample rows:"] + body[:end]):
+                break
+
+    text = "\n".join(lines)
+    return text, count_tokens(text)
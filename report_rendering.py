@@ -0,0 +1,236 @@
+import html
+import json
+import math
+import numbers
+import os
+
+import numpy as np
+
+# Report files are written through a large buffer instead of one big string
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def heading(text, level=2):
+    return {'type': 'heading', 'level': level, 'text': text}
+
+
+def paragraph(text):
+    return {'type': 'text', 'text': text}
+
+
+def bullets(items):
+    """
+    items: list of (label, value) pairs rendered as "- **label:** value".
+    """
+    return {'type': 'bullets', 'items': list(items)}
+
+
+def table(headers, columns, formats=None):
+    """
+    A table given column-wise: one array per header. formats holds per column
+    either None (str), a printf-style string applied to the whole array
+    (e.g. '%.2f%%') or a callable applied to each value.
+    """
+    return {
+        'type': 'table',
+        'headers': list(headers),
+        'columns': [np.asarray(col) for col in columns],
+        'formats': list(formats) if formats else [None] * len(headers)
+    }
+
+
+def image(alt, path):
+    return {'type': 'image', 'alt': alt, 'path': path}
+
+
+def format_value(val):
+    """
+    Numbers (numpy scalars included) with two decimals, everything else
+    (and NaN) as is.
+    """
+    if isinstance(val, numbers.Real) and not math.isnan(val):
+        return f"{val:.2f}"
+    return f"{val}"
+
+
+def format_column(values, fmt):
+    """
+    Turn one table column into an array of strings.
+    """
+    if fmt is None:
+        return values.astype(str)
+    if callable(fmt):
+        return np.array([fmt(val) for val in values], dtype=str)
+    return np.char.mod(fmt, values)
+
+
+def table_rows(section, escape=None):
+    """
+    Build the row lines of a table with vectorized string operations,
+    one column at a time.
+    """
+    cells = [format_column(col, fmt) for col, fmt in zip(section['columns'], section['formats'])]
+    if escape is not None:
+        cells = [np.array([escape(cell) for cell in col], dtype=str) for col in cells]
+    return cells
+
+
+def _join_cells(cells, left, separator, right):
+    if not cells or len(cells[0]) == 0:
+        return []
+    rows = np.char.add(left, cells[0])
+    for col in cells[1:]:
+        rows = np.char.add(np.char.add(rows, separator), col)
+    return np.char.add(rows, right).tolist()
+
+
+class MarkdownWriter:
+    suffix = '.md'
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, section):
+        kind = section['type']
+        if kind == 'heading':
+            self.f.write(f"{'#' * section['level']} {section['text']}\n\n")
+        elif kind == 'text':
+            self.f.write(f"{section['text']}\n\n")
+        elif kind == 'bullets':
+            for label, val in section['items']:
+                self.f.write(f"- **{label}:** {val}\n")
+            self.f.write("\n")
+        elif kind == 'table':
+            headers = section['headers']
+            self.f.write("| " + " | ".join(headers) + " |\n")
+            self.f.write("|" + "|".join('-' * (len(h) + 2) for h in headers) + "|\n")
+            rows = _join_cells(table_rows(section), '| ', ' | ', ' |')
+            if rows:
+                self.f.write("\n".join(rows) + "\n")
+            self.f.write("\n")
+        elif kind == 'image':
+            self.f.write(f"![{section['alt']}]({section['path']})\n\n")
+
+    def close(self):
+        pass
+
+
+class HtmlWriter:
+    suffix = '.html'
+
+    def __init__(self, f):
+        self.f = f
+        self.f.write('<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"></head>\n<body>\n')
+
+    def write(self, section):
+        kind = section['type']
+        if kind == 'heading':
+            level = section['level']
+            self.f.write(f"<h{level}>{html.escape(str(section['text']))}</h{level}>\n")
+        elif kind == 'text':
+            self.f.write(f"<p>{html.escape(str(section['text']))}</p>\n")
+        elif kind == 'bullets':
+            self.f.write("<ul>\n")
+            for label, val in section['items']:
+                self.f.write(f"<li><strong>{html.escape(str(label))}:</strong> "
+                             f"{html.escape(str(val))}</li>\n")
+            self.f.write("</ul>\n")
+        elif kind == 'table':
+            self.f.write("<table>\n<tr>")
+            self.f.write("".join(f"<th>{html.escape(h)}</th>" for h in section['headers']))
+            self.f.write("</tr>\n")
+            rows = _join_cells(table_rows(section, escape=html.escape),
+                               '<tr><td>', '</td><td>', '</td></tr>')
+            if rows:
+                self.f.write("\n".join(rows) + "\n")
+            self.f.write("</table>\n")
+        elif kind == 'image':
+            self.f.write(f'<img src="{html.escape(section["path"])}" '
+                         f'alt="{html.escape(section["alt"])}">\n')
+
+    def close(self):
+        self.f.write("</body>\n</html>\n")
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def _json_value(value):
+    """
+    Replace NaN/inf (missing statistics) with None, as JSON has no NaN.
+    """
+    if isinstance(value, dict):
+        return {key: _json_value(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(val) for val in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class JsonWriter:
+    """
+    Writes the sections as a JSON array, one element at a time. Tables keep
+    their raw (unformatted) column values.
+    """
+    suffix = '.json'
+
+    def __init__(self, f):
+        self.f = f
+        self.first = True
+        self.f.write("[\n")
+
+    def write(self, section):
+        if section['type'] == 'table':
+            section = {
+                'type': 'table',
+                'headers': section['headers'],
+                'columns': [col.tolist() for col in section['columns']]
+            }
+        if not self.first:
+            self.f.write(",\n")
+        self.first = False
+        json.dump(_json_value(section), self.f, ensure_ascii=False, allow_nan=False,
+                  default=_json_default)
+
+    def close(self):
+        self.f.write("\n]\n")
+
+
+WRITERS = {'md': MarkdownWriter, 'html': HtmlWriter, 'json': JsonWriter}
+
+
+def write_report(sections, output_file, formats=('md',)):
+    """
+    Stream report sections into one buffered file per format. The format of
+    output_file itself is taken from its extension when it is a known one;
+    the other formats are written next to it with their own extension.
+    Raises ValueError for a format not in WRITERS.
+    """
+    unknown = [fmt for fmt in formats if fmt not in WRITERS]
+    if unknown:
+        raise ValueError(f"Unknown report format(s): {', '.join(unknown)} "
+                         f"(choose from {', '.join(WRITERS)})")
+    base, _ = os.path.splitext(output_file)
+    paths = {
+        fmt: output_file if output_file.endswith(WRITERS[fmt].suffix) else base + WRITERS[fmt].suffix
+        for fmt in formats
+    }
+    handles = [open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+               for path in paths.values()]
+    try:
+        writers = [WRITERS[fmt](f) for fmt, f in zip(paths, handles)]
+        for section in sections:
+            for writer in writers:
+                writer.write(section)
+        for writer in writers:
+            writer.close()
+    finally:
+        for f in handles:
+            f.close()
+    return list(paths.values())
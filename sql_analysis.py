@@ -0,0 +1,160 @@
+import math
+import sqlite3
+from decimal import Decimal
+
+import pandas as pd
+
+NUMERIC_TYPES = {
+    'integer', 'int', 'bigint', 'smallint', 'real', 'float', 'double',
+    'double precision', 'numeric', 'decimal'
+}
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def dialect_of(connection):
+    return 'sqlite' if isinstance(connection, sqlite3.Connection) else 'postgres'
+
+
+def table_columns(connection, table='users'):
+    """
+    Return [(column, is_numeric)] in table order.
+    """
+    if dialect_of(connection) == 'sqlite':
+        rows = connection.execute(f"PRAGMA table_info({quote_identifier(table)})").fetchall()
+        columns = [(row[1], row[2]) for row in rows]
+    else:
+        rows = connection.execute(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_name = %s ORDER BY ordinal_position", (table,)).fetchall()
+        columns = list(rows)
+    return [
+        (name, (data_type or '').lower().split('(')[0].strip() in NUMERIC_TYPES)
+        for name, data_type in columns
+    ]
+
+
+def _as_float(value):
+    return float(value) if value is not None else float('nan')
+
+
+def _as_number(value):
+    # PostgreSQL NUMERIC arrives as Decimal
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _postgres_numerical(connection, col, table):
+    column = quote_identifier(col)
+    percentiles = ', '.join(
+        f"percentile_cont({q}) WITHIN GROUP (ORDER BY {column})" for q in QUANTILES)
+    row = connection.execute(
+        f"SELECT count({column}), avg({column}), mode() WITHIN GROUP (ORDER BY {column}), "
+        f"stddev_samp({column}), var_samp({column}), min({column}), max({column}), {percentiles} "
+        f"FROM {quote_identifier(table)}").fetchone()
+    count, mean, mode, std, var, min_val, max_val, p25, p50, p75 = row
+    return count, mean, mode, std, var, min_val, max_val, (p25, p50, p75)
+
+
+def _sqlite_numerical(connection, col, table):
+    column = quote_identifier(col)
+    source = f"FROM {quote_identifier(table)} WHERE {column} IS NOT NULL"
+    count, mean, min_val, max_val = connection.execute(
+        f"SELECT count({column}), avg({column}), min({column}), max({column}) {source}").fetchone()
+    if not count:
+        return count, None, None, None, None, None, None, (None,) * len(QUANTILES)
+    # Second pass around the mean keeps the variance numerically stable
+    (squares,) = connection.execute(
+        f"SELECT sum(({column} - ?) * ({column} - ?)) {source}", (mean, mean)).fetchone()
+    var = squares / (count - 1) if count > 1 else None
+    std = math.sqrt(var) if var is not None else None
+    # Ties go to the smallest value, like Series.mode().iloc[0]
+    (mode,) = connection.execute(
+        f"SELECT {column} {source} GROUP BY {column} ORDER BY count(*) DESC, {column} LIMIT 1"
+    ).fetchone()
+    # Linear interpolation between the two neighbouring ranks, as pandas does;
+    # all needed ranks are picked from a single sort
+    positions = [q * (count - 1) for q in QUANTILES]
+    ranks = sorted({math.floor(pos) for pos in positions} | {math.ceil(pos) for pos in positions})
+    rank_list = ', '.join(str(rank) for rank in ranks)
+    values = dict(connection.execute(
+        f"SELECT rn, value FROM (SELECT {column} AS value, "
+        f"row_number() OVER (ORDER BY {column}) - 1 AS rn {source}) "
+        f"WHERE rn IN ({rank_list})").fetchall())
+    quantiles = tuple(
+        values[math.floor(pos)] + (values[math.ceil(pos)] - values[math.floor(pos)]) * (pos - math.floor(pos))
+        for pos in positions
+    )
+    return count, mean, mode, std, var, min_val, max_val, quantiles
+
+
+def numerical_analysis_sql(connection, col, table='users'):
+    """
+    Same dictionary as data_analysis.numerical_analysis, computed by the
+    database (SQLite or PostgreSQL). Only the aggregates leave the server.
+    """
+    if dialect_of(connection) == 'sqlite':
+        result = _sqlite_numerical(connection, col, table)
+    else:
+        result = _postgres_numerical(connection, col, table)
+    count, mean, mode, std, var, min_val, max_val, (p25, p50, p75) = result
+    if not count:
+        return {}
+    mode, min_val, max_val = _as_number(mode), _as_number(min_val), _as_number(max_val)
+    return {
+        'Mean': _as_float(mean),
+        'Median': _as_float(p50),
+        'Mode': mode,
+        'Standard Deviation': _as_float(std),
+        'Variance': _as_float(var),
+        'Min': min_val,
+        'Max': max_val,
+        'Range': max_val - min_val,
+        '25th Percentile': _as_float(p25),
+        '50th Percentile': _as_float(p50),
+        '75th Percentile': _as_float(p75)
+    }
+
+
+def count_rows(connection, table='users'):
+    (total,) = connection.execute(f"SELECT count(*) FROM {quote_identifier(table)}").fetchone()
+    return total
+
+
+def categorical_analysis_sql(connection, col, top_k=5, table='users', total=None):
+    """
+    Same DataFrame as data_analysis.categorical_analysis, from a
+    GROUP BY ... ORDER BY count DESC LIMIT k query.
+    """
+    column = quote_identifier(col)
+    if total is None:
+        total = count_rows(connection, table)
+    rows = connection.execute(
+        f"SELECT {column}, count(*) AS cnt FROM {quote_identifier(table)} "
+        f"WHERE {column} IS NOT NULL GROUP BY {column} "
+        f"ORDER BY cnt DESC, {column} LIMIT {int(top_k)}").fetchall()
+    top = pd.Series([count for _, count in rows], index=[value for value, _ in rows],
+                    dtype='int64', name='count')
+    top.index.name = col
+    percentages = (top / total * 100).round(2) if total else top * 0.0
+    return pd.DataFrame({'Count': top, 'Percentage': percentages})
+
+
+def analyze_table_sql(connection, table='users', top_k=5):
+    """
+    Run the whole report analysis in the database.
+    Returns (num_stats, cat_stats, total_records, total_columns).
+    """
+    columns = table_columns(connection, table)
+    total = count_rows(connection, table)
+    num_stats = {
+        col: numerical_analysis_sql(connection, col, table)
+        for col, is_numeric in columns if is_numeric
+    }
+    cat_stats = {
+        col: categorical_analysis_sql(connection, col, top_k, table, total)
+        for col, is_numeric in columns if not is_numeric
+    }
+    return num_stats, cat_stats, total, len(columns)
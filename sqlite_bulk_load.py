@@ -0,0 +1,126 @@
+import argparse
+import csv
+import sqlite3
+from itertools import islice
+
+# Same table as users_sqlite.sql; the indexes are created after the rows are inserted
+TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    occupation TEXT NOT NULL,
+    salary REAL NOT NULL,
+    created_at TEXT NOT NULL
+)
+"""
+INDEX_DDL = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users(email)",
+    "CREATE INDEX IF NOT EXISTS idx_users_created_at ON users(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_users_occupation ON users(occupation)"
+]
+USER_COLUMNS = ['id', 'first_name', 'last_name', 'email', 'occupation', 'salary', 'created_at']
+
+BATCH_SIZE = 100000
+# Negative cache_size is in KiB: 1 GiB page cache during the load
+LOAD_CACHE_SIZE_KIB = 1024 * 1024
+
+# Journal mode used during the load; unlike LOAD_PRAGMAS it is stored in the
+# database file, so bulk_load switches back to the previous mode afterwards
+LOAD_JOURNAL_MODE = 'WAL'
+# Connection-level settings; they end with the loader's connection
+LOAD_PRAGMAS = [
+    "PRAGMA synchronous = OFF",
+    f"PRAGMA cache_size = -{LOAD_CACHE_SIZE_KIB}",
+    "PRAGMA temp_store = MEMORY"
+]
+
+
+def drop_indexes(conn):
+    for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'users' "
+            "AND name LIKE 'idx_users_%'").fetchall():
+        conn.execute(f'DROP INDEX "{name}"')
+
+
+def bulk_load(db_path, rows, columns=USER_COLUMNS, batch_size=BATCH_SIZE):
+    """
+    Insert an iterable of row tuples into users with executemany, then
+    build the indexes and refresh the planner statistics, all in one
+    transaction. Existing secondary indexes are dropped first so they are
+    built once, not maintained row by row. If anything fails (e.g. a
+    duplicate email breaks the unique index) the whole load is rolled back
+    and the table keeps its previous rows and indexes. The database keeps
+    its journal mode unless another connection blocks switching back.
+    Returns the number of rows inserted.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    (journal_mode,) = conn.execute("PRAGMA journal_mode").fetchone()
+    try:
+        conn.execute(f"PRAGMA journal_mode = {LOAD_JOURNAL_MODE}")
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(pragma)
+        conn.execute(TABLE_DDL)
+
+        placeholders = ', '.join('?' for _ in columns)
+        insert = f"INSERT INTO users ({', '.join(columns)}) VALUES ({placeholders})"
+        total = 0
+        rows = iter(rows)
+        conn.execute("BEGIN")
+        try:
+            drop_indexes(conn)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                conn.executemany(insert, batch)
+                total += len(batch)
+            for statement in INDEX_DDL:
+                conn.execute(statement)
+            conn.execute("ANALYZE users")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return total
+    finally:
+        try:
+            conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+        except sqlite3.OperationalError as e:
+            print(f"Warning: {db_path} left in {LOAD_JOURNAL_MODE} journal mode ({e})")
+        conn.close()
+
+
+def iter_csv_rows(csv_path):
+    """
+    Yield data rows of a users CSV (e.g. from `first.py --fast --schema users`)
+    and the header as the first item.
+    """
+    with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+        yield from csv.reader(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load a users CSV into SQLite.")
+    parser.add_argument('csv_file', help="CSV with users columns and a header row")
+    parser.add_argument('--database', default='database/test.db')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    rows = iter_csv_rows(args.csv_file)
+    columns = next(rows)
+    unknown = [col for col in columns if col not in USER_COLUMNS]
+    if unknown:
+        print(f"Error: unknown users columns in CSV: {', '.join(unknown)}")
+        return
+    try:
+        total = bulk_load(args.database, rows, columns, args.batch_size)
+    except sqlite3.IntegrityError as e:
+        print(f"Error: load rolled back, {e}")
+        return
+    print(f"Loaded {total} rows into {args.database}")
+
+
+if __name__ == "__main__":
+    main()
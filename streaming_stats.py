@@ -0,0 +1,537 @@
+import base64
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Relative accuracy of the quantile sketch (1 % of the returned value)
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# Maximum number of distinct values tracked when looking for the mode
+DEFAULT_MODE_CAPACITY = 10000
+DEFAULT_CHUNKSIZE = 100000
+# Space-Saving counts overestimate by at most error * rows
+DEFAULT_HEAVY_HITTER_ERROR = 0.001
+# 2**14 HyperLogLog registers, about 0.8 % standard error on the distinct count
+DEFAULT_HLL_PRECISION = 14
+
+
+def _plain(value):
+    """
+    Convert numpy scalars to plain Python numbers so state can be saved as JSON.
+    """
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class RunningMoments:
+    """
+    Welford-style accumulator for count, mean, variance, min and max.
+    Chunks are combined with Chan's parallel update, so two accumulators
+    built over different parts of a column can be merged exactly.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, values):
+        values = np.asarray(values)
+        if values.size == 0:
+            return
+        as_float = values.astype('float64', copy=False)
+        chunk_mean = float(as_float.mean())
+        chunk_m2 = float(((as_float - chunk_mean) ** 2).sum())
+        self._combine(values.size, chunk_mean, chunk_m2, values.min(), values.max())
+
+    def add_constant(self, value, count):
+        """
+        Add the same value `count` times (used for median-filled gaps).
+        """
+        if count > 0:
+            self._combine(count, float(value), 0.0, value, value)
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _combine(self, count, mean, m2, min_val, max_val):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min_val if self.min is None or min_val < self.min else self.min
+        self.max = max_val if self.max is None or max_val > self.max else self.max
+
+    def to_state(self):
+        return {
+            'count': self.count, 'mean': self.mean, 'm2': self.m2,
+            'min': _plain(self.min), 'max': _plain(self.max)
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        moments = cls()
+        moments.count = state['count']
+        moments.mean = state['mean']
+        moments.m2 = state['m2']
+        moments.min = state['min']
+        moments.max = state['max']
+        return moments
+
+    @property
+    def variance(self):
+        # Sample variance (ddof=1), same as pandas Series.var()
+        return self.m2 / (self.count - 1) if self.count > 1 else float('nan')
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count > 1 else float('nan')
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with logarithmic buckets (DDSketch).
+    Every quantile is returned within `relative_accuracy` of the true value
+    and memory depends only on the value range, not on the number of rows.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = Counter()
+        self.negative = Counter()
+        self.zero_count = 0
+        self.count = 0
+
+    def _bucket_counts(self, magnitudes):
+        indexes = np.ceil(np.log(magnitudes) / self._log_gamma).astype('int64')
+        keys, counts = np.unique(indexes, return_counts=True)
+        return dict(zip(keys.tolist(), counts.tolist()))
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        if values.size == 0:
+            return
+        positive = values[values > 0]
+        negative = values[values < 0]
+        if positive.size:
+            self.positive.update(self._bucket_counts(positive))
+        if negative.size:
+            self.negative.update(self._bucket_counts(-negative))
+        self.zero_count += int(values.size - positive.size - negative.size)
+        self.count += int(values.size)
+
+    def add(self, value, count=1):
+        if count > 0:
+            self.update(np.full(count, value, dtype='float64'))
+
+    def merge(self, other):
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def to_state(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'positive': list(self.positive.items()),
+            'negative': list(self.negative.items()),
+            'zero_count': self.zero_count,
+            'count': self.count
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['relative_accuracy'])
+        sketch.positive = Counter(dict(state['positive']))
+        sketch.negative = Counter(dict(state['negative']))
+        sketch.zero_count = state['zero_count']
+        sketch.count = state['count']
+        return sketch
+
+    def _bucket_value(self, index):
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return float('nan')
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._bucket_value(index)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._bucket_value(index)
+        return self._bucket_value(max(self.positive))
+
+
+class ExactQuantiles:
+    """
+    Keeps every value so quantiles match pandas exactly (linear interpolation).
+    Memory grows with the column, so it is only used in exact mode.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.count = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        if values.size:
+            self.parts.append(values)
+            self.count += int(values.size)
+
+    def add(self, value, count=1):
+        if count > 0:
+            self.update(np.full(count, value, dtype='float64'))
+
+    def merge(self, other):
+        self.parts.extend(other.parts)
+        self.count += other.count
+        return self
+
+    def to_state(self):
+        values = np.concatenate(self.parts) if self.parts else np.empty(0)
+        return {'values': values.tolist()}
+
+    @classmethod
+    def from_state(cls, state):
+        quantiles = cls()
+        quantiles.update(state['values'])
+        return quantiles
+
+    def quantile(self, q):
+        if self.count == 0:
+            return float('nan')
+        if len(self.parts) > 1:
+            self.parts = [np.concatenate(self.parts)]
+        return float(np.quantile(self.parts[0], q))
+
+
+class ModeCounter:
+    """
+    Value counter for the mode. With a capacity it becomes a Misra-Gries
+    summary: any value occurring more than n / capacity times is kept.
+    Without a capacity (exact mode) all distinct values are counted.
+    """
+
+    def __init__(self, capacity=DEFAULT_MODE_CAPACITY):
+        self.capacity = capacity
+        self.counts = Counter()
+
+    def update(self, values):
+        values = np.asarray(values)
+        if values.size == 0:
+            return
+        keys, counts = np.unique(values, return_counts=True)
+        self.counts.update(dict(zip(keys.tolist(), counts.tolist())))
+        self._prune()
+
+    def add(self, value, count=1):
+        if count > 0:
+            self.counts[value] += count
+            self._prune()
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self._prune()
+        return self
+
+    def _prune(self):
+        if self.capacity is None or len(self.counts) <= self.capacity:
+            return
+        threshold = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.counts = Counter({
+            value: count - threshold
+            for value, count in self.counts.items()
+            if count > threshold
+        })
+
+    def to_state(self):
+        return {'capacity': self.capacity, 'counts': list(self.counts.items())}
+
+    @classmethod
+    def from_state(cls, state):
+        counter = cls(state['capacity'])
+        counter.counts = Counter(dict((value, count) for value, count in state['counts']))
+        return counter
+
+    def mode(self, fallback):
+        """
+        Most frequent value; ties go to the smallest value like Series.mode().
+        If no value is seen more than once every value was (nearly) unique,
+        in which case pandas would return the smallest value, i.e. `fallback`.
+        """
+        top = max(self.counts.values(), default=0)
+        if top <= 1:
+            return fallback
+        return min(value for value, count in self.counts.items() if count == top)
+
+
+class ColumnAccumulator:
+    """
+    One-pass accumulator for a single numerical column.
+    Produces the same dictionary as data_analysis.numerical_analysis.
+    """
+
+    def __init__(self, exact=False, relative_accuracy=DEFAULT_RELATIVE_ACCURACY,
+                 mode_capacity=DEFAULT_MODE_CAPACITY):
+        self.exact = exact
+        self.moments = RunningMoments()
+        if exact:
+            self.quantiles = ExactQuantiles()
+            self.modes = ModeCounter(capacity=None)
+        else:
+            self.quantiles = QuantileSketch(relative_accuracy)
+            self.modes = ModeCounter(capacity=mode_capacity)
+
+    def update(self, series):
+        values = series.dropna().to_numpy()
+        if values.size == 0:
+            return
+        self.moments.update(values)
+        self.quantiles.update(values)
+        self.modes.update(values)
+
+    def add_constant(self, value, count):
+        self.moments.add_constant(value, count)
+        self.quantiles.add(value, count)
+        self.modes.add(value, count)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        self.modes.merge(other.modes)
+        return self
+
+    def to_state(self):
+        return {
+            'exact': self.exact,
+            'moments': self.moments.to_state(),
+            'quantiles': self.quantiles.to_state(),
+            'modes': self.modes.to_state()
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Rebuild an accumulator saved with to_state() (e.g. from a JSON file).
+        """
+        acc = cls(exact=state['exact'])
+        acc.moments = RunningMoments.from_state(state['moments'])
+        quantile_cls = ExactQuantiles if acc.exact else QuantileSketch
+        acc.quantiles = quantile_cls.from_state(state['quantiles'])
+        acc.modes = ModeCounter.from_state(state['modes'])
+        return acc
+
+    def quantile(self, q):
+        value = self.quantiles.quantile(q)
+        # Sketch buckets may overshoot the observed range slightly
+        return min(max(value, float(self.moments.min)), float(self.moments.max))
+
+    def to_dict(self):
+        if self.moments.count == 0:
+            return {}
+        min_val = self.moments.min
+        max_val = self.moments.max
+        median = self.quantile(0.5)
+        # Sketch mode: the counts are bounded and gaps were filled with an
+        # approximate median, so the most frequent value may not be in the data
+        mode_label = 'Mode' if self.exact else 'Mode (approximate)'
+        return {
+            'Mean': self.moments.mean,
+            'Median': median,
+            mode_label: self.modes.mode(fallback=min_val),
+            'Standard Deviation': self.moments.std,
+            'Variance': self.moments.variance,
+            'Min': min_val,
+            'Max': max_val,
+            'Range': max_val - min_val,
+            '25th Percentile': self.quantile(0.25),
+            '50th Percentile': median,
+            '75th Percentile': self.quantile(0.75)
+        }
+
+
+class SpaceSaving:
+    """
+    Mergeable Space-Saving summary for the most frequent values of a column.
+    Keeps ceil(1 / error) counters; every reported count is an upper bound
+    that overestimates the true count by at most error * rows.
+    """
+
+    def __init__(self, error=DEFAULT_HEAVY_HITTER_ERROR):
+        self.error = error
+        self.capacity = math.ceil(1 / error)
+        self.counts = pd.Series(dtype='int64')
+        self.errors = pd.Series(dtype='int64')
+        self.count = 0
+
+    def update(self, series):
+        """
+        Merge a chunk: its exact value counts form a summary of their own.
+        """
+        chunk_counts = series.value_counts(sort=False)
+        chunk_counts = chunk_counts[chunk_counts > 0]
+        self._merge(chunk_counts, pd.Series(0, index=chunk_counts.index, dtype='int64'),
+                    min_count=0)
+        self.count += int(chunk_counts.sum())
+
+    def merge(self, other):
+        other_min = int(other.counts.min()) if len(other.counts) >= other.capacity else 0
+        self._merge(other.counts, other.errors, min_count=other_min)
+        self.count += other.count
+        return self
+
+    def _merge(self, counts, errors, min_count):
+        # A value missing from a full summary may have occurred up to its minimum count
+        own_min = int(self.counts.min()) if len(self.counts) >= self.capacity else 0
+        keys = self.counts.index.union(counts.index)
+        merged_counts = (self.counts.reindex(keys, fill_value=own_min)
+                         + counts.reindex(keys, fill_value=min_count))
+        merged_errors = (self.errors.reindex(keys, fill_value=own_min)
+                         + errors.reindex(keys, fill_value=min_count))
+        kept = merged_counts.sort_values(ascending=False, kind='stable').index[:self.capacity]
+        self.counts = merged_counts[kept]
+        self.errors = merged_errors[kept]
+
+    def to_state(self):
+        return {
+            'error': self.error,
+            'counts': [[_plain(value), int(count)] for value, count in self.counts.items()],
+            'errors': [int(error) for error in self.errors.reindex(self.counts.index)],
+            'count': self.count
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        summary = cls(state['error'])
+        values = [value for value, _ in state['counts']]
+        summary.counts = pd.Series([count for _, count in state['counts']], index=values,
+                                   dtype='int64')
+        summary.errors = pd.Series(state['errors'], index=values, dtype='int64')
+        summary.count = state['count']
+        return summary
+
+    @property
+    def saturated(self):
+        """
+        True once values had to be evicted, i.e. the counts are estimates.
+        """
+        return len(self.counts) >= self.capacity
+
+    def top(self, k):
+        """
+        Return the k values with the highest estimated counts.
+        """
+        return self.counts.sort_values(ascending=False, kind='stable').head(k)
+
+    @property
+    def max_error(self):
+        return int(self.count * self.error)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count estimator with 2**precision one-byte registers.
+    Registers of two sketches merge with an element-wise maximum.
+    """
+
+    def __init__(self, precision=DEFAULT_HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype='uint8')
+
+    def update(self, series):
+        series = series.dropna()
+        if series.empty:
+            return
+        hashes = pd.util.hash_pandas_object(series, index=False).to_numpy(dtype='uint64')
+        value_bits = 64 - self.precision
+        indexes = (hashes >> np.uint64(value_bits)).astype('int64')
+        remainder = hashes & np.uint64((1 << value_bits) - 1)
+        # Position of the leftmost 1-bit in the remaining bits (value_bits + 1 if all zero)
+        bit_length = np.frexp(remainder.astype('float64'))[1]
+        ranks = (value_bits - bit_length + 1).astype('uint8')
+        np.maximum.at(self.registers, indexes, ranks)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def to_state(self):
+        return {'precision': self.precision,
+                'registers': base64.b64encode(self.registers.tobytes()).decode('ascii')}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['precision'])
+        sketch.registers = np.frombuffer(base64.b64decode(state['registers']),
+                                         dtype='uint8').copy()
+        return sketch
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype('float64')))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+def heavy_hitters(series, k=5, error=DEFAULT_HEAVY_HITTER_ERROR,
+                  precision=DEFAULT_HLL_PRECISION, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Approximate top-k values and distinct count of a column in bounded memory.
+    The column is consumed in slices so no hash table of all distinct values
+    is ever built. Returns (top-k counts Series, distinct estimate, max error).
+    """
+    summary = SpaceSaving(error)
+    distinct = HyperLogLog(precision)
+    for start in range(0, len(series), chunksize):
+        part = series.iloc[start:start + chunksize]
+        summary.update(part)
+        distinct.update(part)
+    return summary.top(k), distinct.estimate(), summary.max_error
+
+
+def analyze_chunks(chunks, columns=None, exact=False):
+    """
+    Run the one-pass engine over an iterable of DataFrame chunks.
+    If no columns are given, the numerical columns of the first chunk are used.
+    Returns {column: statistics dictionary}.
+    """
+    accumulators = None
+    for chunk in chunks:
+        if accumulators is None:
+            if columns is None:
+                columns = list(chunk.select_dtypes(include=['number']).columns)
+            accumulators = {col: ColumnAccumulator(exact=exact) for col in columns}
+        for col in columns:
+            accumulators[col].update(chunk[col])
+    if accumulators is None:
+        return {}
+    return {col: acc.to_dict() for col, acc in accumulators.items()}
+
+
+def streaming_numerical_analysis(file_path, columns=None, chunksize=DEFAULT_CHUNKSIZE, exact=False):
+    """
+    Read a CSV file in blocks and compute numerical statistics in a single pass.
+    Memory stays flat unless exact=True, which keeps the values for exact quantiles.
+    """
+    chunks = pd.read_csv(file_path, chunksize=chunksize, usecols=columns)
+    return analyze_chunks(chunks, columns=columns, exact=exact)
@@ -0,0 +1,191 @@
+import glob
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    # CSV is then written with pandas; Parquet output needs pyarrow
+    pa = None
+
+# Distinct values drawn from Faker once per run, then sampled with numpy
+VOCABULARY_SIZE = 5000
+DEFAULT_CHUNK_ROWS = 1_000_000
+SALARY_RANGE = (850, 3500)
+CREATED_AT_START = np.datetime64('2020-01-01')
+CREATED_AT_DAYS = 6 * 365
+
+# first.py's original columns and the `users` table from users.sql
+SCHEMAS = {
+    'first': ['id', 'first_name', 'last_name', 'city', 'occupation', 'salary'],
+    'users': ['id', 'first_name', 'last_name', 'email', 'occupation', 'salary', 'created_at']
+}
+
+
+def build_vocabularies(seed, size=VOCABULARY_SIZE):
+    """
+    Call Faker a fixed number of times and keep the distinct values.
+    """
+    Faker.seed(seed)
+    faker = Faker()
+    providers = {
+        'first_name': faker.first_name,
+        'last_name': faker.last_name,
+        'city': faker.city,
+        'occupation': faker.job
+    }
+    return {
+        name: sorted({provider() for _ in range(size)})
+        for name, provider in providers.items()
+    }
+
+
+def generate_chunk(rng, vocabularies, start_id, rows, columns, total_rows):
+    """
+    Build one chunk of rows as {column: array} from the vocabularies and the
+    shard's random generator. String columns are dictionary indexes.
+    """
+    data = {}
+    indexes = {}
+    for col in columns:
+        if col == 'id':
+            data[col] = np.arange(start_id, start_id + rows, dtype='int64')
+        elif col in vocabularies:
+            indexes[col] = rng.integers(0, len(vocabularies[col]), rows, dtype='int32')
+            data[col] = indexes[col]
+        elif col == 'salary':
+            data[col] = rng.integers(SALARY_RANGE[0], SALARY_RANGE[1] + 1, rows)
+        elif col == 'created_at':
+            # Grows with id, like rows appended to the real table over time
+            ids = np.arange(start_id, start_id + rows, dtype='int64')
+            days = (ids - 1) * CREATED_AT_DAYS // total_rows
+            data[col] = CREATED_AT_START + days.astype('timedelta64[D]')
+        elif col == 'email':
+            data[col] = None
+    return data, indexes
+
+
+def chunk_to_table(data, indexes, vocabularies, columns):
+    arrays = {}
+    for col in columns:
+        if col in indexes:
+            arrays[col] = pa.DictionaryArray.from_arrays(
+                pa.array(indexes[col]), pa.array(vocabularies[col]))
+        elif col == 'email':
+            # first.last.<id>@example.com keeps the address unique like users.sql requires
+            first = pa.array(vocabularies['first_name'])
+            last = pa.array(vocabularies['last_name'])
+            arrays[col] = pc.binary_join_element_wise(
+                pc.utf8_lower(pc.take(first, pa.array(indexes['first_name']))),
+                pc.utf8_lower(pc.take(last, pa.array(indexes['last_name']))),
+                pc.cast(pa.array(data['id']), pa.string()),
+                '.'
+            )
+            arrays[col] = pc.binary_join_element_wise(arrays[col], 'example.com', '@')
+        elif col == 'created_at':
+            arrays[col] = pa.array(data[col]).cast(pa.date32())
+        else:
+            arrays[col] = pa.array(data[col])
+    return pa.table(arrays)
+
+
+def chunk_to_frame(data, indexes, vocabularies, columns):
+    frame = {}
+    for col in columns:
+        if col in indexes:
+            frame[col] = pd.Categorical.from_codes(indexes[col], vocabularies[col])
+        elif col == 'email':
+            first = pd.Series(np.asarray(vocabularies['first_name'])[indexes['first_name']])
+            last = pd.Series(np.asarray(vocabularies['last_name'])[indexes['last_name']])
+            frame[col] = (first.str.lower() + '.' + last.str.lower() + '.'
+                          + pd.Series(data['id']).astype(str) + '@example.com')
+        else:
+            frame[col] = data[col]
+    return pd.DataFrame(frame)
+
+
+def generate_shard(task):
+    """
+    Worker: write rows [start_id, stop_id) to `path` chunk by chunk.
+    """
+    (path, seed_sequence, vocabularies, start_id, stop_id, total_rows,
+     columns, fmt, chunk_rows) = task
+    rng = np.random.default_rng(seed_sequence)
+    parquet_writer = None
+    with open(path, 'wb') as f:
+        for chunk_start in range(start_id, stop_id, chunk_rows):
+            rows = min(chunk_rows, stop_id - chunk_start)
+            data, indexes = generate_chunk(rng, vocabularies, chunk_start, rows, columns,
+                                           total_rows)
+            # Only the very first CSV chunk carries the header, shards are concatenated
+            header = chunk_start == 1
+            if pa is None:
+                chunk_to_frame(data, indexes, vocabularies, columns).to_csv(
+                    f, header=header, index=False)
+                continue
+            table = chunk_to_table(data, indexes, vocabularies, columns)
+            if fmt == 'parquet':
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(f, table.schema)
+                parquet_writer.write_table(table)
+            else:
+                pa_csv.write_csv(table, f, pa_csv.WriteOptions(include_header=header))
+        if parquet_writer is not None:
+            parquet_writer.close()
+    return path
+
+
+def generate_users(output, num_rows, workers=1, fmt='csv', seed=0, schema='first',
+                   chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Generate `num_rows` synthetic users with numpy sampling, split into one
+    shard per worker. Shard seeds are spawned from `seed`, so the output only
+    depends on (seed, num_rows, workers). CSV shards are joined into `output`;
+    Parquet shards replace the part files of the directory `output`.
+    """
+    if fmt == 'parquet' and pa is None:
+        raise RuntimeError("Parquet output requires pyarrow.")
+    columns = SCHEMAS[schema]
+    vocabularies = build_vocabularies(seed)
+    workers = max(1, min(workers, num_rows))
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    bounds = np.linspace(1, num_rows + 1, workers + 1).astype('int64')
+
+    if fmt == 'parquet':
+        # Parts of an earlier run (e.g. with more workers) would be read as rows too
+        os.makedirs(output, exist_ok=True)
+        for part in glob.glob(os.path.join(output, 'part-*.parquet')):
+            os.remove(part)
+        part_dir = output
+    else:
+        part_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(output)))
+    tasks = [
+        (os.path.join(part_dir, f'part-{shard:05d}.{fmt}'), seeds[shard], vocabularies,
+         int(bounds[shard]), int(bounds[shard + 1]), num_rows, columns, fmt, chunk_rows)
+        for shard in range(workers)
+    ]
+    if workers == 1:
+        parts = [generate_shard(tasks[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(generate_shard, tasks))
+
+    if fmt == 'parquet':
+        return parts
+    try:
+        with open(output, 'wb') as out:
+            for part in parts:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out, length=16 * 1024 * 1024)
+    finally:
+        shutil.rmtree(part_dir)
+    return [output]
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from title_fetcher import TitleFetcher, fetch_titles, read_head, response_encoding
+
+SLOW_SECONDS = 0.2
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """
+    /slow waits SLOW_SECONDS and counts requests in flight, /cp1250 and
+    /meta serve a non-UTF-8 title, /missing is a 404.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            with self.lock:
+                PageHandler.in_flight += 1
+                PageHandler.max_in_flight = max(PageHandler.max_in_flight, PageHandler.in_flight)
+            time.sleep(SLOW_SECONDS)
+            with self.lock:
+                PageHandler.in_flight -= 1
+            self.send_page(b'<html><head><title>Slow</title></head><body></body></html>')
+        elif self.path == '/cp1250':
+            self.send_page('<html><head><title>Štatistika čísel</title></head></html>'.encode('cp1250'),
+                           'text/html; charset=windows-1250')
+        elif self.path == '/meta':
+            body = '<html><head><meta charset="iso-8859-2"><title>Žltý kôň</title></head></html>'
+            self.send_page(body.encode('iso-8859-2'), 'text/html')
+        else:
+            self.send_page(b'', status=404)
+
+    def send_page(self, body, content_type='text/html', status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeResponse:
+    """
+    Stands in for an httpx response; records how many blocks were read.
+    """
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.read = 0
+
+    async def aiter_bytes(self):
+        for block in self.blocks:
+            self.read += 1
+            yield block
+
+
+class TitleFetcherTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+        cls.server.daemon_threads = True
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        PageHandler.in_flight = 0
+        PageHandler.max_in_flight = 0
+
+    def test_per_host_limit(self):
+        urls = [f"{self.base_url}/slow/{i}" for i in range(9)]
+        results = fetch_titles(urls, max_connections=20, per_host=3)
+        self.assertEqual([title for _, title, _ in results], ['Slow'] * 9)
+        self.assertEqual(PageHandler.max_in_flight, 3)
+
+    def test_queued_requests_wait_for_the_pool(self):
+        # 8 requests over 2 connections take ~4x longer than the timeout allows one request
+        urls = [f"{self.base_url}/slow/{i}" for i in range(8)]
+        results = fetch_titles(urls, max_connections=2, per_host=8, timeout=SLOW_SECONDS * 2)
+        self.assertEqual([error for _, _, error in results], [None] * 8)
+        self.assertLessEqual(PageHandler.max_in_flight, 2)
+
+    def test_charset_from_header_and_meta(self):
+        results = fetch_titles([f"{self.base_url}/cp1250", f"{self.base_url}/meta"])
+        self.assertEqual([title for _, title, _ in results], ['Štatistika čísel', 'Žltý kôň'])
+
+    def test_errors_are_returned_in_order(self):
+        urls = [f"{self.base_url}/missing", f"{self.base_url}/slow/0"]
+        results = fetch_titles(urls)
+        self.assertEqual([url for url, _, _ in results], urls)
+        self.assertIn('HTTPStatusError', results[0][2])
+        self.assertEqual(results[1][1:], ('Slow', None))
+
+    def test_malformed_url_does_not_abort_the_batch(self):
+        urls = ['http://[::1/', 'mailto:someone@example.com', f"{self.base_url}/slow/0"]
+        results = fetch_titles(urls)
+        self.assertEqual([url for url, _, _ in results], urls)
+        self.assertIn('ValueError', results[0][2])
+        self.assertIsNotNone(results[1][2])
+        self.assertEqual(results[2][1:], ('Slow', None))
+
+    def test_fetcher_is_reusable_for_several_batches(self):
+        async def run():
+            async with TitleFetcher(per_host=2) as fetcher:
+                first = await fetcher.fetch_all([f"{self.base_url}/slow/a"])
+                second = await fetcher.fetch_all([f"{self.base_url}/meta"])
+            return first + second
+        self.assertEqual([title for _, title, _ in asyncio.run(run())], ['Slow', 'Žltý kôň'])
+
+
+class ReadHeadTest(unittest.TestCase):
+
+    def test_stops_after_head(self):
+        response = FakeResponse([b'<html><head><title>A</title></he', b'ad><body>', b'x' * 1000,
+                                 b'y' * 1000])
+        head = asyncio.run(read_head(response))
+        self.assertEqual(response.read, 2)
+        self.assertTrue(head.endswith(b'</head><body>'))
+
+    def test_truncates_at_max_bytes(self):
+        response = FakeResponse([b'<html><head>' + b'x' * 100] * 50)
+        head = asyncio.run(read_head(response, max_bytes=256))
+        self.assertEqual(len(head), 256)
+        self.assertEqual(response.read, 3)
+
+    def test_response_encoding(self):
+        self.assertEqual(response_encoding('text/html; charset=UTF-8', b''), 'UTF-8')
+        self.assertEqual(response_encoding('text/html', b'<meta charset="cp1250">'), 'cp1250')
+        self.assertEqual(response_encoding(None, b'<html>'), 'utf-8')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import asyncio
+import html
+import re
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+try:
+    import lxml.html
+except ImportError:
+    # Without selectolax/lxml the title is taken with a regular expression
+    lxml = None
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_PER_HOST = 4
+DEFAULT_TIMEOUT = 10.0
+# Stop reading a page after this many bytes even if </head> did not come
+MAX_HEAD_BYTES = 64 * 1024
+USER_AGENT = "Mozilla/5.0 (compatible; title-fetcher)"
+
+HEAD_END = re.compile(rb'</head\s*>|<body[\s>]', re.IGNORECASE)
+TITLE = re.compile(r'<title[^>]*>(.*?)</title\s*>', re.IGNORECASE | re.DOTALL)
+META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def response_encoding(content_type, head):
+    """
+    Charset from the Content-Type header, then from a <meta> tag, else UTF-8.
+    """
+    match = re.search(r'charset=["\']?([\w-]+)', content_type or '', re.IGNORECASE)
+    if match:
+        return match.group(1)
+    match = META_CHARSET.search(head)
+    return match.group(1).decode('ascii') if match else 'utf-8'
+
+
+def parse_title(head, encoding='utf-8'):
+    """
+    Title text from the first bytes of an HTML page, or None.
+    """
+    try:
+        text = head.decode(encoding, errors='replace')
+    except LookupError:
+        text = head.decode('utf-8', errors='replace')
+    if HTMLParser is not None:
+        node = HTMLParser(text).css_first('title')
+        title = node.text() if node is not None else None
+    elif lxml is not None:
+        try:
+            title = lxml.html.fromstring(text).findtext('.//title')
+        except (ValueError, lxml.etree.ParserError):
+            title = None
+    else:
+        match = TITLE.search(text)
+        title = html.unescape(match.group(1)) if match else None
+    if title is None:
+        return None
+    title = ' '.join(title.split())
+    return title or None
+
+
+async def read_head(response, max_bytes=MAX_HEAD_BYTES):
+    """
+    Read the body only until </head> (or <body>) shows up or max_bytes
+    have arrived; the rest of the page is never downloaded.
+    """
+    head = bytearray()
+    async for block in response.aiter_bytes():
+        search_from = max(0, len(head) - 16)
+        head += block
+        if HEAD_END.search(head, search_from) or len(head) >= max_bytes:
+            break
+    return bytes(head[:max_bytes])
+
+
+class TitleFetcher:
+    """
+    Fetches page titles concurrently over one pooled httpx.AsyncClient.
+    max_connections bounds the whole pool, per_host the parallel requests
+    to one host. `timeout` applies to connecting and reading; waiting for a
+    free pool connection is not limited, so any number of URLs can queue.
+    """
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, per_host=DEFAULT_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT, max_head_bytes=MAX_HEAD_BYTES):
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_head_bytes = max_head_bytes
+        self.host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        self.client = None
+
+    async def __aenter__(self):
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+        timeout = httpx.Timeout(self.timeout, pool=None)
+        self.client = httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True,
+                                        headers={'User-Agent': USER_AGENT})
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+
+    async def fetch(self, url):
+        """
+        Returns (url, title, error); title is None when the page has none.
+        Any failure (a malformed URL included) becomes the error of this URL
+        only, so one bad page cannot abort the other fetches.
+        """
+        try:
+            async with self.host_limits[urlsplit(url).netloc]:
+                async with self.client.stream('GET', url) as response:
+                    response.raise_for_status()
+                    head = await read_head(response, self.max_head_bytes)
+                    encoding = response_encoding(response.headers.get('content-type'), head)
+                return url, parse_title(head, encoding), None
+        except Exception as e:
+            message = ' '.join(str(e).split())
+            return url, None, f"{type(e).__name__}: {message}"
+
+    async def fetch_all(self, urls):
+        """
+        Fetch all URLs concurrently; results are in the order of `urls`.
+        """
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+
+def fetch_titles(urls, max_connections=DEFAULT_MAX_CONNECTIONS, per_host=DEFAULT_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT):
+    """
+    Blocking helper: [(url, title, error)] for a list of URLs.
+    """
+    async def run():
+        async with TitleFetcher(max_connections, per_host, timeout) as fetcher:
+            return await fetcher.fetch_all(urls)
+    return asyncio.run(run())
@@ -0,0 +1,213 @@
+import argparse
+import atexit
+import os
+import threading
+from functools import lru_cache
+
+import psycopg
+import yaml
+from psycopg import sql
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from pg_streaming import DEFAULT_ITERSIZE, copy_users_to_csv, iter_user_frames, write_frames_parquet
+
+USER_COLUMNS = ('id', 'first_name', 'last_name', 'email', 'occupation', 'salary', 'created_at')
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = 10
+
+# One pool per connection string for the lifetime of the process
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def load_config(path='config.yaml'):
+    """
+    Parse config.yaml once per process instead of on every call.
+    """
+    with open(path, 'r') as file:
+        return yaml.safe_load(file)
+
+
+def conninfo_from_env():
+    return make_conninfo(
+        host=os.getenv("DB_HOST"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD")
+    )
+
+
+def conninfo_from_yaml(path='config.yaml'):
+    db_config = load_config(path)['database']
+    return make_conninfo(
+        host=db_config['host'],
+        dbname=db_config['name'],
+        user=db_config['user'],
+        password=db_config['password']
+    )
+
+
+def get_pool(conninfo, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE):
+    """
+    Return the shared connection pool for `conninfo`, opening it on first use.
+    Connections (and their TLS sessions) are reused across calls. Safe to
+    call from several threads; only one pool is opened per conninfo.
+    """
+    pool = _pools.get(conninfo)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(conninfo)
+            if pool is None:
+                pool = ConnectionPool(conninfo, min_size=min_size, max_size=max_size, open=True)
+                _pools[conninfo] = pool
+    return pool
+
+
+@atexit.register
+def close_pools():
+    """
+    Close all pools opened by get_pool; also runs at interpreter exit.
+    A later get_pool call opens a new pool.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+async def open_async_pool(conninfo, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE):
+    """
+    Open an asyncio pool; it has to be created inside the running event loop.
+    """
+    pool = AsyncConnectionPool(conninfo, min_size=min_size, max_size=max_size, open=False)
+    await pool.open()
+    return pool
+
+
+def build_users_query(columns=None, created_from=None, created_to=None, limit=None):
+    """
+    Build a parameterized SELECT on users. Only known columns can be
+    projected; the date range is [created_from, created_to).
+    Returns (query, params).
+    """
+    columns = list(columns) if columns else list(USER_COLUMNS)
+    unknown = [col for col in columns if col not in USER_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown users columns: {', '.join(unknown)}")
+
+    conditions = []
+    params = []
+    if created_from is not None:
+        conditions.append(sql.SQL("created_at >= %s"))
+        params.append(created_from)
+    if created_to is not None:
+        conditions.append(sql.SQL("created_at < %s"))
+        params.append(created_to)
+
+    query = sql.SQL("SELECT {} FROM users").format(
+        sql.SQL(', ').join(sql.Identifier(col) for col in columns))
+    if conditions:
+        query += sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions)
+    query += sql.SQL(" ORDER BY id")
+    if limit is not None:
+        query += sql.SQL(" LIMIT %s")
+        params.append(limit)
+    return query, params
+
+
+def select_users(pool, columns=None, created_from=None, created_to=None, limit=None):
+    """
+    Run the filtered/projected users query on a pooled connection.
+    prepare=True makes the server keep the plan for the statement.
+    """
+    query, params = build_users_query(columns, created_from, created_to, limit)
+    with pool.connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(query, params, prepare=True)
+            return cursor.fetchall()
+
+
+async def select_users_async(pool, columns=None, created_from=None, created_to=None, limit=None):
+    """
+    Async variant of select_users for an AsyncConnectionPool.
+    """
+    query, params = build_users_query(columns, created_from, created_to, limit)
+    async with pool.connection() as connection:
+        async with connection.cursor() as cursor:
+            await cursor.execute(query, params, prepare=True)
+            return await cursor.fetchall()
+
+
+def print_users(conninfo, columns=None, created_from=None, created_to=None):
+    """
+    Print the users rows selected by the filters.
+    """
+    try:
+        # Borrow a connection from the shared pool and run the parameterized query
+        rows = select_users(get_pool(conninfo), columns=columns,
+                            created_from=created_from, created_to=created_to)
+
+        # Print the results
+        print("All users:")
+        for row in rows:
+            print(row)
+
+    except psycopg.Error as error:
+        print(f"Error while connecting to PostgreSQL or executing query: {error}")
+
+
+def export_users(conninfo, output_file, use_copy=False, itersize=DEFAULT_ITERSIZE,
+                 columns=None, created_from=None, created_to=None):
+    """
+    Stream the selected users to a file without holding them in memory:
+    COPY TO STDOUT for CSV, or a server-side cursor feeding Parquet chunks.
+    """
+    try:
+        query, params = build_users_query(columns, created_from, created_to)
+        with get_pool(conninfo).connection() as connection:
+            if use_copy:
+                copy_users_to_csv(connection, output_file, query, params)
+                print(f"Users exported with COPY to {output_file}")
+            else:
+                frames = iter_user_frames(connection, query, params, itersize=itersize)
+                total = write_frames_parquet(frames, output_file)
+                print(f"{total} users streamed to {output_file}")
+
+    except psycopg.Error as error:
+        print(f"Error while connecting to PostgreSQL or executing query: {error}")
+
+
+def run_users_cli(get_conninfo, description):
+    """
+    Command line shared by the pg_data_analysis scripts; they only differ
+    in where the connection settings come from (get_conninfo()).
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--columns', help="comma-separated columns to select (default: all)")
+    parser.add_argument('--from', dest='created_from', metavar='DATE',
+                        help="only users created on or after DATE")
+    parser.add_argument('--to', dest='created_to', metavar='DATE',
+                        help="only users created before DATE")
+    parser.add_argument('--stream', metavar='FILE.parquet',
+                        help="stream users through a server-side cursor into a Parquet file")
+    parser.add_argument('--copy', metavar='FILE.csv', help="export users with COPY TO STDOUT")
+    parser.add_argument('--itersize', type=int, default=DEFAULT_ITERSIZE,
+                        help="rows per server-side cursor fetch")
+    args = parser.parse_args()
+    columns = args.columns.split(',') if args.columns else None
+    conninfo = get_conninfo()
+
+    try:
+        if args.copy:
+            export_users(conninfo, args.copy, use_copy=True, columns=columns,
+                         created_from=args.created_from, created_to=args.created_to)
+        elif args.stream:
+            export_users(conninfo, args.stream, itersize=args.itersize, columns=columns,
+                         created_from=args.created_from, created_to=args.created_to)
+        else:
+            print_users(conninfo, columns, args.created_from, args.created_to)
+    finally:
+        close_pools()
@@ -4,7 +4,7 @@ CREATE TABLE users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     first_name TEXT NOT NULL,
     last_name TEXT NOT NULL,
-    email TEXT NOT NULL UNIQUE,
+    email TEXT NOT NULL,
     occupation TEXT NOT NULL,
     salary REAL NOT NULL,
     created_at TEXT NOT NULL
@@ -32,3 +32,9 @@ INSERT INTO users (first_name, last_name, email, occupation, salary, created_at)
 ('Roman', 'Marek', 'roman.marek@simplemail.com', 'Database Administrator', 3400.00, '2026-01-18'),
 ('Monika', 'Blažeková', 'monika.blazekova@example.com', 'Scrum Master', 3100.00, '2026-01-19'),
 ('Filip', 'Klein', 'filip.klein@example.com', 'Web Developer', 3000.00, '2026-01-20');
+
+-- Indexes are built after the data is loaded; UNIQUE(email) is enforced by its index
+CREATE UNIQUE INDEX idx_users_email ON users(email);
+-- Time-range filters and GROUP BY occupation in the analysis queries
+CREATE INDEX idx_users_created_at ON users(created_at);
+CREATE INDEX idx_users_occupation ON users(occupation);